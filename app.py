@@ -14,7 +14,7 @@ import os
 from utils.auth import hash_password
 
 # Multi-tenant database management
-from db_manager import get_master_db, get_org_db, create_master_db, create_org_database
+from db_manager import get_master_db, get_org_db, create_master_db, create_org_database, close_request_dbs
 
 # Multi-tenant middleware
 from middleware.tenant_context_separate_db import set_tenant_context
@@ -150,6 +150,10 @@ def before_request_handler():
         g.is_organization_admin = False
         g.is_employee = False
 
+
+# Close request-scoped database connections opened by the middleware
+app.teardown_appcontext(close_request_dbs)
+
 # ---------------------------------------------------------------------------
 # System endpoints (health check, schema re-init)
 # ---------------------------------------------------------------------------
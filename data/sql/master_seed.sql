@@ -0,0 +1,51 @@
+-- Seed data for master.db: permission definitions and role templates
+-- Loaded by migrations/create_master_database.py; safe to re-run (INSERT OR IGNORE)
+
+-- Permission definitions
+INSERT OR IGNORE INTO permission_definitions (permission_key, category, description, required_role) VALUES
+('inventory.view', 'inventory', 'View inventory items', 'employee'),
+('inventory.create', 'inventory', 'Create new inventory items', 'organization_admin'),
+('inventory.edit', 'inventory', 'Edit existing inventory items', 'organization_admin'),
+('inventory.delete', 'inventory', 'Delete inventory items', 'organization_admin'),
+('inventory.count', 'inventory', 'Perform inventory counts', 'employee'),
+('employees.view', 'employees', 'View employee list and profiles', 'organization_admin'),
+('employees.create', 'employees', 'Add new employees', 'organization_admin'),
+('employees.edit', 'employees', 'Edit employee information', 'organization_admin'),
+('employees.delete', 'employees', 'Delete employees', 'organization_admin'),
+('employees.view_own', 'employees', 'View own employee profile', 'employee'),
+('employees.edit_own', 'employees', 'Edit own employee profile', 'employee'),
+('payroll.view', 'payroll', 'View payroll information', 'organization_admin'),
+('payroll.process', 'payroll', 'Process payroll runs', 'organization_admin'),
+('payroll.approve', 'payroll', 'Approve paychecks', 'organization_admin'),
+('payroll.view_own', 'payroll', 'View own paystubs', 'employee'),
+('timeclock.clockin', 'timeclock', 'Clock in/out', 'employee'),
+('timeclock.view_own', 'timeclock', 'View own time entries', 'employee'),
+('timeclock.view_all', 'timeclock', 'View all time entries', 'organization_admin'),
+('timeclock.edit_all', 'timeclock', 'Edit any time entries', 'organization_admin'),
+('sales.view', 'sales', 'View sales records', 'employee'),
+('sales.create', 'sales', 'Record new sales', 'employee'),
+('sales.edit', 'sales', 'Edit sales records', 'organization_admin'),
+('sales.delete', 'sales', 'Delete sales records', 'organization_admin'),
+('products.view', 'products', 'View products and recipes', 'employee'),
+('products.create', 'products', 'Create new products', 'organization_admin'),
+('products.edit', 'products', 'Edit products and recipes', 'organization_admin'),
+('products.delete', 'products', 'Delete products', 'organization_admin'),
+('invoices.view', 'invoices', 'View invoices', 'employee'),
+('invoices.create', 'invoices', 'Create new invoices', 'organization_admin'),
+('invoices.edit', 'invoices', 'Edit invoices', 'organization_admin'),
+('invoices.delete', 'invoices', 'Delete invoices', 'organization_admin'),
+('reports.view', 'reports', 'View reports and analytics', 'organization_admin'),
+('reports.export', 'reports', 'Export report data', 'organization_admin'),
+('settings.view', 'settings', 'View organization settings', 'organization_admin'),
+('settings.edit', 'settings', 'Edit organization settings', 'organization_admin'),
+('settings.billing', 'settings', 'Manage billing and subscription', 'organization_admin'),
+('users.view', 'users', 'View user list', 'organization_admin'),
+('users.create', 'users', 'Invite new users', 'organization_admin'),
+('users.edit', 'users', 'Edit user permissions', 'organization_admin'),
+('users.delete', 'users', 'Delete users', 'organization_admin');
+
+-- Role templates
+INSERT OR IGNORE INTO role_templates (role_name, display_name, description, default_permissions) VALUES
+('super_admin', 'Super Administrator', 'Full access to all organizations', '["*"]'),
+('organization_admin', 'Organization Administrator', 'Full access within organization', '["inventory.*", "employees.*", "payroll.*", "timeclock.*", "sales.*", "products.*", "invoices.*", "reports.*", "settings.*", "users.*", "schedules.*"]'),
+('employee', 'Employee', 'Limited access to own data', '["inventory.view", "inventory.count", "employees.view_own", "employees.edit_own", "payroll.view_own", "timeclock.clockin", "timeclock.view_own", "sales.view", "sales.create", "products.view", "invoices.view"]');
@@ -22,9 +22,13 @@ Usage:
     create_org_database(organization_id)
 """
 
+import atexit
 import sqlite3
 import os
+import pathlib
 import shutil
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from flask import g
 
@@ -35,6 +39,14 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MASTER_DB_PATH = os.path.join(BASE_DIR, 'master.db')
 DATABASES_DIR = os.path.join(BASE_DIR, 'databases')
 
+# Prepared statements kept per master.db connection (sqlite3 default is 128)
+MASTER_CACHED_STATEMENTS = 256
+
+# Table options for the text-keyed master lookup tables (permission_definitions,
+# role_templates): no separate rowid btree, plus STRICT typing on SQLite 3.37+
+LOOKUP_TABLE_OPTIONS = ("WITHOUT ROWID, STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0)
+                        else "WITHOUT ROWID")
+
 # Ensure directories exist
 os.makedirs(BASE_DIR, exist_ok=True)
 os.makedirs(DATABASES_DIR, exist_ok=True)
@@ -45,6 +57,159 @@ os.makedirs(DATABASES_DIR, exist_ok=True)
 # ---------------------------------------------------------------------------
 _org_path_cache: dict[int, str] = {}
 
+# ---------------------------------------------------------------------------
+# Org connection pool  (db path -> idle connections, least recently used first)
+# get_org_db() checks a connection out and conn.close() hands it back, so hot
+# tenants skip sqlite3_open + schema parsing on every call. The number of
+# idle connections is capped; the least recently used tenant is evicted.
+# Each checkout gets its own PooledConnection handle, so a second close()
+# on an old handle can't release a connection someone else now holds.
+# ---------------------------------------------------------------------------
+ORG_POOL_MAX_IDLE = 32
+
+# Prepared statements kept per pooled org connection. Pooled connections
+# outlive requests, so hot queries stay prepared across requests.
+ORG_CACHED_STATEMENTS = 256
+
+_org_pool: "OrderedDict[str, list]" = OrderedDict()
+_org_pool_idle = 0
+_org_pool_lock = threading.Lock()
+# db path -> eviction count. A connection opened before its path was evicted
+# is closed when released instead of going back to the pool.
+_org_pool_epoch = {}
+
+
+class _OrgConnection(sqlite3.Connection):
+    """Pooled sqlite3 connection; carries its pool path and epoch."""
+
+
+class PooledConnection:
+    """
+    One checkout of a pooled org connection.
+
+    Forwards everything to the underlying sqlite3 connection. close() hands
+    the connection back to the pool once; after that the handle behaves like
+    a closed connection, so a repeated close() is a no-op and stray use
+    raises instead of touching another checkout's transaction.
+    """
+    __slots__ = ('_conn',)
+
+    def __init__(self, conn):
+        object.__setattr__(self, '_conn', conn)
+
+    def _live(self):
+        conn = self._conn
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return conn
+
+    def __getattr__(self, name):
+        return getattr(self._live(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._live(), name, value)
+
+    def __enter__(self):
+        self._live().__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._live().__exit__(exc_type, exc, tb)
+
+    def close(self):
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, '_conn', None)
+            _release_org_conn(conn)
+
+
+def _checkout_org_conn(db_path):
+    """Take an idle pooled connection for db_path, or open a new one."""
+    global _org_pool_idle
+
+    with _org_pool_lock:
+        idle = _org_pool.get(db_path)
+        if idle:
+            conn = idle.pop()
+            _org_pool_idle -= 1
+            if not idle:
+                del _org_pool[db_path]
+            conn.row_factory = sqlite3.Row
+            return PooledConnection(conn)
+
+    conn = sqlite3.connect(
+        db_path, factory=_OrgConnection, check_same_thread=False,
+        cached_statements=ORG_CACHED_STATEMENTS,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn._pool_path = db_path
+    conn._pool_epoch = _org_pool_epoch.get(db_path, 0)
+    return PooledConnection(conn)
+
+
+def _release_org_conn(conn):
+    """Return a connection to the pool, evicting the LRU tenant when full."""
+    global _org_pool_idle
+
+    try:
+        if conn.in_transaction:
+            conn.rollback()  # Same as close(): uncommitted work is discarded
+    except sqlite3.Error:
+        conn.close()
+        return
+
+    evicted = []
+    with _org_pool_lock:
+        if conn._pool_epoch != _org_pool_epoch.get(conn._pool_path, 0):
+            # evict_org_pool() ran for this file while it was checked out
+            evicted.append(conn)
+        else:
+            _org_pool.setdefault(conn._pool_path, []).append(conn)
+            _org_pool.move_to_end(conn._pool_path)
+            _org_pool_idle += 1
+        while _org_pool_idle > ORG_POOL_MAX_IDLE:
+            path, idle = next(iter(_org_pool.items()))
+            evicted.append(idle.pop(0))
+            _org_pool_idle -= 1
+            if not idle:
+                del _org_pool[path]
+
+    for old in evicted:
+        old.close()
+
+
+def close_org_pool():
+    """Close every idle pooled org connection (registered with atexit)."""
+    global _org_pool_idle
+
+    with _org_pool_lock:
+        idle = [conn for conns in _org_pool.values() for conn in conns]
+        _org_pool.clear()
+        _org_pool_idle = 0
+    for conn in idle:
+        conn.close()
+
+
+atexit.register(close_org_pool)
+
+
+def evict_org_pool(db_path):
+    """
+    Drop pooled connections to one org database file.
+
+    Call when the file at db_path is created, restored or deleted: idle
+    connections are closed now, checked-out ones when they are released.
+    """
+    global _org_pool_idle
+
+    with _org_pool_lock:
+        _org_pool_epoch[db_path] = _org_pool_epoch.get(db_path, 0) + 1
+        idle = _org_pool.pop(db_path, [])
+        _org_pool_idle -= len(idle)
+    for conn in idle:
+        conn.close()
+
 
 # ===========================================================================
 #  Connection helpers
@@ -56,7 +221,7 @@ def get_master_db():
     Contains: organizations, users, sessions, invitations, audit_log,
               permission_definitions, role_templates.
     """
-    conn = sqlite3.connect(MASTER_DB_PATH)
+    conn = sqlite3.connect(MASTER_DB_PATH, cached_statements=MASTER_CACHED_STATEMENTS)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -70,7 +235,8 @@ def get_org_db(organization_id=None):
         organization_id: Optional org ID. If not provided, uses g.organization.
 
     Returns:
-        SQLite connection to organization's database.
+        SQLite connection to organization's database, checked out of the
+        org pool. conn.close() returns it to the pool.
     """
     if organization_id is None:
         if not hasattr(g, 'organization') or not g.organization:
@@ -85,9 +251,7 @@ def get_org_db(organization_id=None):
     if org_id in _org_path_cache:
         db_path = _org_path_cache[org_id]
         if os.path.exists(db_path):
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
-            return conn
+            return _checkout_org_conn(db_path)
         else:
             # Cached path is stale; remove it and fall through
             del _org_path_cache[org_id]
@@ -111,11 +275,84 @@ def get_org_db(organization_id=None):
     # Store in cache for next time
     _org_path_cache[org_id] = db_path
 
-    conn = sqlite3.connect(db_path)
+    return _checkout_org_conn(db_path)
+
+
+def get_master_read_db():
+    """
+    Get a read-only connection to master database for user/org lookups.
+    Opened via URI in mode=ro with a shared page cache and autocommit, so
+    lookups never take write locks or hold a read transaction open.
+    """
+    uri = f"{pathlib.Path(MASTER_DB_PATH).as_uri()}?mode=ro&cache=shared"
+    conn = sqlite3.connect(
+        uri, uri=True, isolation_level=None,
+        cached_statements=MASTER_CACHED_STATEMENTS,
+    )
     conn.row_factory = sqlite3.Row
     return conn
 
 
+_master_wal_enabled = False
+
+
+def get_request_master_db():
+    """
+    Get the read-only master database connection shared by the current
+    request (tenant context lookups). Opened on first use and closed by
+    close_request_dbs() when the app context tears down, so callers must
+    NOT close it. Writes go through get_master_db().
+    """
+    global _master_wal_enabled
+
+    conn = g.get('_master_conn')
+    if conn is None:
+        if not _master_wal_enabled:
+            # WAL is persistent in the file; readers stop blocking on writers.
+            # A read-only connection can't switch it, so use a writable one once.
+            setup = get_master_db()
+            setup.execute("PRAGMA journal_mode=WAL")
+            setup.close()
+            _master_wal_enabled = True
+        conn = g._master_conn = get_master_read_db()
+    return conn
+
+
+def get_request_org_db():
+    """
+    Get the current organization's database connection shared by the request.
+    Checked out of the org pool on first use and returned to it by
+    close_request_dbs(), so callers must NOT close it.
+    """
+    if not hasattr(g, 'organization') or not g.organization:
+        raise ValueError(
+            "No organization context set. Use @organization_required decorator."
+        )
+    org_id = g.organization['id']
+
+    cached = g.get('_org_conn')
+    if cached is not None:
+        if cached[0] == org_id:
+            return cached[1]
+        # Organization context changed mid-request (super admin switch)
+        cached[1].close()
+
+    conn = get_org_db(org_id)
+    g._org_conn = (org_id, conn)
+    return conn
+
+
+def close_request_dbs(exc=None):
+    """Close per-request connections. Registered with app.teardown_appcontext."""
+    conn = g.pop('_master_conn', None)
+    if conn is not None:
+        conn.close()
+
+    cached = g.pop('_org_conn', None)
+    if cached is not None:
+        cached[1].close()
+
+
 @contextmanager
 def master_db():
     """Context-managed master database connection. Auto-closes on exit."""
@@ -138,6 +375,11 @@ def org_db(organization_id=None):
 
 def get_org_db_path(organization_id):
     """Get filesystem path to organization's database file."""
+    # Shares the org path cache with get_org_db(); a missing file re-queries
+    db_path = _org_path_cache.get(organization_id)
+    if db_path is not None and os.path.exists(db_path):
+        return db_path
+
     master_conn = get_master_db()
     cursor = master_conn.cursor()
     cursor.execute(
@@ -150,7 +392,9 @@ def get_org_db_path(organization_id):
     if not result:
         return None
 
-    return os.path.join(DATABASES_DIR, result['db_filename'])
+    db_path = os.path.join(DATABASES_DIR, result['db_filename'])
+    _org_path_cache[organization_id] = db_path
+    return db_path
 
 
 # ===========================================================================
@@ -207,20 +451,19 @@ def create_master_db():
             primary_color TEXT DEFAULT '#2563eb',
             plan_type TEXT DEFAULT 'basic',
             subscription_status TEXT DEFAULT 'active',
-            monthly_price DECIMAL(10,2) DEFAULT 99.00,
+            monthly_price REAL DEFAULT 99.00,
             billing_email TEXT,
             max_employees INTEGER DEFAULT 50,
             max_products INTEGER DEFAULT 1000,
             max_storage_mb INTEGER DEFAULT 5000,
             features TEXT,
-            active BOOLEAN DEFAULT 1,
+            active INTEGER DEFAULT 1 CHECK (active IN (0, 1)),
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_organizations_slug ON organizations(slug)"
-    )
+    # slug is UNIQUE - the autoindex already serves slug lookups
+    cursor.execute("DROP INDEX IF EXISTS idx_organizations_slug")
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_organizations_active ON organizations(active)"
     )
@@ -263,9 +506,9 @@ def create_master_db():
             avatar_url TEXT,
             role TEXT NOT NULL,
             permissions TEXT,
-            can_switch_organizations BOOLEAN DEFAULT 0,
+            can_switch_organizations INTEGER DEFAULT 0 CHECK (can_switch_organizations IN (0, 1)),
             current_organization_id INTEGER,
-            active BOOLEAN DEFAULT 1,
+            active INTEGER DEFAULT 1 CHECK (active IN (0, 1)),
             last_login TIMESTAMP,
             last_password_change TIMESTAMP,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -278,9 +521,8 @@ def create_master_db():
             )
         )
     """)
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)"
-    )
+    # email is UNIQUE, so its autoindex covers lookups by email
+    cursor.execute("DROP INDEX IF EXISTS idx_users_email")
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_users_organization ON users(organization_id)"
     )
@@ -289,27 +531,25 @@ def create_master_db():
     )
 
     # ---- permission_definitions ----
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE TABLE IF NOT EXISTS permission_definitions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            permission_key TEXT NOT NULL UNIQUE,
+            permission_key TEXT NOT NULL PRIMARY KEY,
             category TEXT NOT NULL,
             description TEXT NOT NULL,
             required_role TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        ) {LOOKUP_TABLE_OPTIONS}
     """)
 
     # ---- role_templates ----
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE TABLE IF NOT EXISTS role_templates (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            role_name TEXT NOT NULL UNIQUE,
+            role_name TEXT NOT NULL PRIMARY KEY,
             display_name TEXT NOT NULL,
             description TEXT,
             default_permissions TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        ) {LOOKUP_TABLE_OPTIONS}
     """)
 
     # ---- user_sessions ----
@@ -327,11 +567,13 @@ def create_master_db():
             FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE SET NULL
         )
     """)
+    # session_token is UNIQUE; (user_id, expires_at) range-scans a user's
+    # live sessions and still serves user_id-only lookups
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_token")
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_user")
     cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_sessions_token ON user_sessions(session_token)"
-    )
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_sessions_user ON user_sessions(user_id)"
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user_expires "
+        "ON user_sessions(user_id, expires_at)"
     )
 
     # ---- organization_invitations ----
@@ -352,11 +594,13 @@ def create_master_db():
             FOREIGN KEY (invited_by) REFERENCES users(id) ON DELETE CASCADE
         )
     """)
+    # invitation_token is UNIQUE. The duplicate-invite check matches
+    # email, organization_id and status; email first keeps email lookups.
+    cursor.execute("DROP INDEX IF EXISTS idx_invitations_token")
+    cursor.execute("DROP INDEX IF EXISTS idx_invitations_email")
     cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_invitations_token ON organization_invitations(invitation_token)"
-    )
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_invitations_email ON organization_invitations(email)"
+        "CREATE INDEX IF NOT EXISTS idx_invitations_email_org_status "
+        "ON organization_invitations(email, organization_id, status)"
     )
 
     # ---- audit_log ----
@@ -376,8 +620,12 @@ def create_master_db():
             FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
         )
     """)
+    # Recent activity per org: filter and ORDER BY created_at DESC from one
+    # index. Supersedes the organization_id-only index.
+    cursor.execute("DROP INDEX IF EXISTS idx_audit_organization")
     cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_audit_organization ON audit_log(organization_id)"
+        "CREATE INDEX IF NOT EXISTS idx_audit_org_time "
+        "ON audit_log(organization_id, created_at DESC, action)"
     )
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_log(user_id)"
@@ -413,9 +661,8 @@ def create_master_db():
             FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
         )
     """)
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_share_token ON share_tokens(token)"
-    )
+    # token is UNIQUE, which already indexes it
+    cursor.execute("DROP INDEX IF EXISTS idx_share_token")
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_share_expires ON share_tokens(expires_at)"
     )
@@ -466,6 +713,9 @@ def create_org_database(organization_id):
     already_existed = os.path.exists(new_db_path)
     if already_existed:
         print(f"   Database already exists: {new_db_path}")
+    else:
+        # Pooled connections may still point at a deleted file of this name
+        evict_org_pool(new_db_path)
 
     # Connect (creates file if it does not exist yet)
     conn = sqlite3.connect(new_db_path)
@@ -696,7 +946,10 @@ def create_org_database(organization_id):
         )
     """)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices(invoice_date)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_invoices_supplier ON invoices(supplier_name)")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_invoices_supplier_total "
+        "ON invoices(supplier_name, total_amount)"
+    )
     cur.execute("CREATE INDEX IF NOT EXISTS idx_invoices_reconciled ON invoices(reconciled)")
 
     cur.execute("""
@@ -923,7 +1176,7 @@ def create_org_database(organization_id):
             pto_hours_available REAL DEFAULT 80.0,
             pto_hours_used REAL DEFAULT 0.0,
             pto_accrual_rate REAL DEFAULT 0.0385,
-            pto_last_accrual_date DATE,
+            pto_last_accrual_date DATE DEFAULT CURRENT_DATE,
             job_classification TEXT DEFAULT 'Front',
             bank_account_number TEXT,
             bank_routing_number TEXT,
@@ -931,8 +1184,10 @@ def create_org_database(organization_id):
         )
     """)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_user_id ON employees(user_id)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_code ON employees(employee_code)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_status ON employees(status)")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_employees_active "
+        "ON employees(status) WHERE status = 'active'"
+    )
 
     # -- HR: Attendance ----------------------------------------------------
     cur.execute("""
@@ -956,7 +1211,11 @@ def create_org_database(organization_id):
             FOREIGN KEY (organization_id) REFERENCES organizations(id)
         )
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_attendance_employee ON attendance(employee_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_attendance_emp_clockin ON attendance(employee_id, clock_in DESC)")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_attendance_open "
+        "ON attendance(organization_id, employee_id, clock_in) WHERE clock_out IS NULL"
+    )
     cur.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance(clock_in)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_attendance_status ON attendance(status)")
 
@@ -989,8 +1248,11 @@ def create_org_database(organization_id):
             FOREIGN KEY (change_requested_by) REFERENCES employees(id)
         )
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_schedules_employee ON schedules(employee_id)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_schedules_date ON schedules(date)")
+    # Shift lookups are per employee and day; every date range query also
+    # filters on organization_id (idx_schedules_org_date)
+    cur.execute("DROP INDEX IF EXISTS idx_schedules_employee")
+    cur.execute("DROP INDEX IF EXISTS idx_schedules_date")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_schedules_employee_date ON schedules(employee_id, date)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_schedules_org_date ON schedules(organization_id, date)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_schedules_status ON schedules(status)")
 
@@ -1040,9 +1302,11 @@ def create_org_database(organization_id):
             FOREIGN KEY (employee_id) REFERENCES employees(id)
         )
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_availability_employee ON employee_availability(employee_id)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_availability_day ON employee_availability(day_of_week)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_availability_org ON employee_availability(organization_id)")
+    # Serves WHERE organization_id/employee_id ORDER BY day_of_week, start_time
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_availability_org_emp_day "
+        "ON employee_availability(organization_id, employee_id, day_of_week, start_time)"
+    )
 
     # -- Payroll: History --------------------------------------------------
     cur.execute("""
@@ -9,6 +9,13 @@ Usage:
     from inventory_warnings import check_inventory_warnings, format_warning_message
 """
 
+# Message templates per warning type, formatted once per emitted warning
+_TEMPLATES = {
+    'negative': "❌ {name} will go NEGATIVE ({qty:.2f} {unit})",
+    'zero': "⚠️ {name} will hit ZERO ({unit})",
+    'low_stock': "ℹ️ {name} will be low ({qty:.2f} {unit}, {pct:.0f}% remaining)",
+}
+
 def check_inventory_warnings(deductions_list, conn, low_stock_threshold=0.1):
     """
     Universal warning checker for inventory changes.
@@ -34,14 +41,19 @@ def check_inventory_warnings(deductions_list, conn, low_stock_threshold=0.1):
             - severity: 'critical', 'warning', 'info'
     """
     warnings = []
-    cursor = conn.cursor()
 
     for item in deductions_list:
+        current_qty = float(item.get('current_qty', 0))
+        new_qty = float(item.get('new_qty', 0))
+
+        # Fast path: most items stay comfortably stocked - skip field
+        # extraction and dict building entirely for them
+        if new_qty > 0 and (current_qty <= 0 or new_qty >= current_qty * low_stock_threshold):
+            continue
+
         ingredient_id = item.get('ingredient_id')
         ingredient_name = item.get('ingredient_name')
         ingredient_code = item.get('ingredient_code')
-        current_qty = float(item.get('current_qty', 0))
-        new_qty = float(item.get('new_qty', 0))
         deduction = float(item.get('deduction', 0))
         unit = item.get('unit', 'ea')
 
@@ -57,7 +69,7 @@ def check_inventory_warnings(deductions_list, conn, low_stock_threshold=0.1):
                 'new_qty': new_qty,
                 'deduction': deduction,
                 'unit': unit,
-                'message': f"❌ {ingredient_name} will go NEGATIVE ({new_qty:.2f} {unit})"
+                'message': _TEMPLATES['negative'].format(name=ingredient_name, qty=new_qty, unit=unit)
             })
 
         # WARNING: Will hit zero
@@ -72,11 +84,12 @@ def check_inventory_warnings(deductions_list, conn, low_stock_threshold=0.1):
                 'new_qty': new_qty,
                 'deduction': deduction,
                 'unit': unit,
-                'message': f"⚠️ {ingredient_name} will hit ZERO ({unit})"
+                'message': _TEMPLATES['zero'].format(name=ingredient_name, unit=unit)
             })
 
-        # INFO: Low stock (within threshold %)
-        elif current_qty > 0 and new_qty > 0 and new_qty < (current_qty * low_stock_threshold):
+        # INFO: Low stock (within threshold %). Kept explicit rather than a
+        # bare else: a NaN quantity fails every check above
+        elif current_qty > 0 and new_qty > 0:
             pct_remaining = (new_qty / current_qty) * 100
             warnings.append({
                 'type': 'low_stock',
@@ -89,7 +102,7 @@ def check_inventory_warnings(deductions_list, conn, low_stock_threshold=0.1):
                 'deduction': deduction,
                 'unit': unit,
                 'pct_remaining': pct_remaining,
-                'message': f"ℹ️ {ingredient_name} will be low ({new_qty:.2f} {unit}, {pct_remaining:.0f}% remaining)"
+                'message': _TEMPLATES['low_stock'].format(name=ingredient_name, qty=new_qty, unit=unit, pct=pct_remaining)
             })
 
     return warnings
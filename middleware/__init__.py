@@ -10,8 +10,10 @@ from .tenant_context_separate_db import (
     organization_admin_required,
     permission_required,
     own_data_only,
+    guard,
     log_audit,
-    user_has_permission
+    user_has_permission,
+    invalidate_org_cache
 )
 
 from .feature_gating import feature_required, has_feature
@@ -24,8 +26,10 @@ __all__ = [
     'organization_admin_required',
     'permission_required',
     'own_data_only',
+    'guard',
     'log_audit',
     'user_has_permission',
+    'invalidate_org_cache',
     'feature_required',
     'has_feature',
 ]
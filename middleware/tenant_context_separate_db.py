@@ -7,54 +7,296 @@ Key differences from shared DB approach:
 - Complete physical isolation between organizations
 """
 
-from functools import wraps
-from flask import g, session, request, jsonify, redirect, url_for
-import sqlite3
+from functools import lru_cache, wraps
+from flask import g, session, request, redirect, url_for, has_app_context, current_app
+import atexit
 import json
 import os
+import queue
+import threading
+import time
+
+from db_manager import (
+    DATABASES_DIR, get_master_db as _open_master_db, get_request_master_db, get_request_org_db
+)
+
+# ---------------------------------------------------------------------------
+# Organization lookup cache  ((kind, key) -> (expires_at, org))
+# set_tenant_context runs before every request and keeps resolving the same
+# few organizations, so lookups are cached per process for a short TTL.
+# Misses are cached too (shorter TTL) so unknown hosts/slugs don't thrash.
+# ---------------------------------------------------------------------------
+ORG_CACHE_TTL = 60
+ORG_CACHE_NEGATIVE_TTL = 10
+ORG_CACHE_MAXSIZE = 1024
+
+_org_cache = {}
+_org_cache_lock = threading.RLock()
+
+# Hosts without a website-enabled custom domain (host -> expires_at), so
+# _resolve_storefront can bail out before any lookup for ordinary traffic
+NON_STOREFRONT_HOST_TTL = 30
+NON_STOREFRONT_HOST_MAXSIZE = 4096
+
+_non_storefront_hosts = {}
+
+
+def _org_cache_get(kind, key):
+    """Return (hit, org) for a cached organization lookup"""
+    with _org_cache_lock:
+        entry = _org_cache.get((kind, key))
+        if entry is None:
+            return False, None
+        if entry[0] < time.monotonic():
+            del _org_cache[(kind, key)]
+            return False, None
+        return True, entry[1]
+
+
+def _org_cache_put(kind, key, org):
+    """Store an organization lookup result (None is cached as a miss)"""
+    ttl = ORG_CACHE_TTL if org else ORG_CACHE_NEGATIVE_TTL
+    with _org_cache_lock:
+        if len(_org_cache) >= ORG_CACHE_MAXSIZE:
+            now = time.monotonic()
+            for stale in [k for k, (expires_at, _) in _org_cache.items() if expires_at < now]:
+                del _org_cache[stale]
+            if len(_org_cache) >= ORG_CACHE_MAXSIZE:
+                # Still full - drop the oldest entry
+                del _org_cache[next(iter(_org_cache))]
+        _org_cache[(kind, key)] = (time.monotonic() + ttl, org)
+
+
+def invalidate_org_cache(org_id=None, slug=None, domain=None):
+    """
+    Drop cached organization lookups after an organization is changed.
+
+    Args:
+        org_id: Drops every cached entry for this organization (by id, slug or domain)
+        slug: Drops the cached entry for this slug (e.g. a cached miss for a new slug)
+        domain: Drops the cached entry for this custom domain
+
+    With no arguments the whole cache is cleared.
+    """
+    if has_app_context():
+        g.pop('_org_cache', None)
+
+    with _org_cache_lock:
+        # Any org change may enable a website or custom domain
+        _non_storefront_hosts.clear()
+
+        if org_id is None and slug is None and domain is None:
+            _org_cache.clear()
+            return
+
+        for cache_key, (_, org) in list(_org_cache.items()):
+            kind, key = cache_key
+            if ((org_id is not None and org and str(org['id']) == str(org_id))
+                    or (org_id is not None and kind in ('id', 'full') and str(key) == str(org_id))
+                    or (slug is not None and kind == 'slug' and key == slug)
+                    or (domain is not None and kind == 'domain' and key == domain)):
+                del _org_cache[cache_key]
+
+
+class OrgRecord:
+    """
+    Read-only view over an organizations row (sqlite3.Row or a plain dict).
+
+    Wraps the sqlite3.Row directly instead of copying it into a dict, so
+    cached organizations cost one small object. Supports the dict-style
+    access callers already use (org['id'], org.get(...), 'x' in org,
+    dict(org)) as well as attribute access (org.id) for templates.
+
+    db_path is the organization's database file, derived from db_filename
+    once when the record is built so requests don't call get_org_db_path().
+    """
+    __slots__ = ('_row', 'db_path')
+
+    def __init__(self, row):
+        self._row = row
+        db_filename = row['db_filename']
+        self.db_path = os.path.join(DATABASES_DIR, db_filename) if db_filename else None
+
+    def __getitem__(self, key):
+        try:
+            return self._row[key]
+        except (IndexError, KeyError):
+            raise KeyError(key) from None
+
+    def __getattr__(self, name):
+        try:
+            return self._row[name]
+        except (IndexError, KeyError):
+            raise AttributeError(name) from None
+
+    def get(self, key, default=None):
+        try:
+            return self._row[key]
+        except (IndexError, KeyError):
+            return default
+
+    def keys(self):
+        return self._row.keys()
+
+    def __contains__(self, key):
+        return key in self._row.keys()
+
+    def __iter__(self):
+        return iter(self._row.keys())
+
+    def __len__(self):
+        return len(self._row)
+
+    def __repr__(self):
+        return f"OrgRecord({dict(self)!r})"
+
+
+def _request_memoized(f):
+    """Memoize an organization lookup on flask.g for the rest of the request"""
+    @wraps(f)
+    def wrapper(key):
+        if not has_app_context():
+            return f(key)
+        memo = g.get('_org_cache')
+        if memo is None:
+            memo = g._org_cache = {}
+        memo_key = (f.__name__, key)
+        if memo_key not in memo:
+            memo[memo_key] = f(key)
+        return memo[memo_key]
+    return wrapper
+
+# ---------------------------------------------------------------------------
+# Hot-path SQL, built once so every execute() passes the identical string
+# and hits the connection's prepared-statement cache
+# ---------------------------------------------------------------------------
+_ORG_SUMMARY_COLUMNS = (
+    'id', 'organization_name', 'slug', 'db_filename', 'owner_name', 'owner_email',
+    'plan_type', 'subscription_status', 'active', 'logo_url', 'features'
+)
+
+# Optional organizations columns (added by later migrations), detected once
+# per process by _check_org_schema() so older master.db files keep working
+# without try/except on every lookup. None until checked.
+HAS_FEATURES_COL = None
+HAS_CUSTOM_DOMAIN_COL = None
+
+# Built by _check_org_schema() (the summary select depends on HAS_FEATURES_COL)
+_SQL_ORG_BY_ID = None
+_SQL_ORG_BY_SLUG = None
+_SQL_ORG_FULL = "SELECT * FROM organizations WHERE id = ? AND active = 1"
+_SQL_ORG_BY_DOMAIN = "SELECT * FROM organizations WHERE custom_domain = ? AND active = 1"
+_SQL_EMPLOYEE_ID_FOR_USER = "SELECT id FROM employees WHERE user_id = ?"
+
+# Ownership checks for entity types owned through an employee_id column:
+# one JOIN answers "does this row belong to the current user's employee?"
+_OWN_SQL = {
+    'paycheck': (
+        "SELECT 1 FROM paychecks p JOIN employees e ON e.id = p.employee_id "
+        "WHERE p.id = ? AND e.user_id = ? LIMIT 1"
+    ),
+    'time_entry': (
+        "SELECT 1 FROM time_entries t JOIN employees e ON e.id = t.employee_id "
+        "WHERE t.id = ? AND e.user_id = ? LIMIT 1"
+    ),
+}
+
+# Built on first use by _get_user_select_sql()
+_user_select_sql = None
+
+def _org_summary_columns(alias=None):
+    """SELECT list for the organization summary columns (optionally o.x AS o_x)"""
+    selected = []
+    for column in _ORG_SUMMARY_COLUMNS:
+        if column == 'features' and not HAS_FEATURES_COL:
+            expr = 'NULL'
+        else:
+            expr = f"{alias}.{column}" if alias else column
+        name = f"{alias}_{column}" if alias else column
+        selected.append(expr if expr == name else f"{expr} AS {name}")
+    return ', '.join(selected)
+
+def _check_org_schema(conn):
+    """Detect optional organizations columns and build the org SELECTs"""
+    global HAS_FEATURES_COL, HAS_CUSTOM_DOMAIN_COL, _SQL_ORG_BY_ID, _SQL_ORG_BY_SLUG
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(organizations)")}
+    HAS_CUSTOM_DOMAIN_COL = 'custom_domain' in columns
+    HAS_FEATURES_COL = 'features' in columns
+    _SQL_ORG_BY_ID = f"SELECT {_org_summary_columns()} FROM organizations WHERE id = ? AND active = 1"
+    _SQL_ORG_BY_SLUG = f"SELECT {_org_summary_columns()} FROM organizations WHERE slug = ? AND active = 1"
 
 def get_master_db():
-    """Get master database connection"""
-    from db_manager import get_master_db as _get_master_db
-    return _get_master_db()
+    """Get the request-scoped master database connection (closed at teardown)"""
+    conn = get_request_master_db()
+    if HAS_FEATURES_COL is None:
+        _check_org_schema(conn)
+    return conn
 
 def get_current_user():
-    """Get currently logged in user from master database"""
+    """
+    Get currently logged in user from master database.
+    The result is cached on g for the rest of the request (keyed by the
+    session user_id, so a login/logout mid-request is picked up).
+    """
     user_id = session.get('user_id')
     if not user_id:
         return None
 
-    conn = get_master_db()
-    cursor = conn.cursor()
+    cached = g.get('_current_user')
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
 
-    # Try to query with last_password_change column (for backward compatibility)
-    try:
-        cursor.execute("""
-            SELECT id, organization_id, email, first_name, last_name, role,
-                   permissions, can_switch_organizations, current_organization_id, active,
-                   last_password_change
-            FROM users
-            WHERE id = ? AND active = 1
-        """, (user_id,))
-    except sqlite3.OperationalError as e:
-        # Column doesn't exist yet (pre-migration), query without it
-        if 'no such column: last_password_change' in str(e):
-            cursor.execute("""
-                SELECT id, organization_id, email, first_name, last_name, role,
-                       permissions, can_switch_organizations, current_organization_id, active
-                FROM users
-                WHERE id = ? AND active = 1
-            """, (user_id,))
-        else:
-            raise
+    user = _load_current_user(user_id)
+    g._current_user = (user_id, user)
+    return user
+
+def _get_user_select_sql(conn):
+    """
+    Build the user SELECT once per process. last_password_change is only
+    selected when the column exists (it is added by a migration), which is
+    detected with a single PRAGMA instead of catching errors per request.
 
-    row = cursor.fetchone()
-    conn.close()
+    The user's (active) organization is LEFT JOINed in with o_-prefixed
+    columns, so the common request needs one query for user + organization.
+    """
+    global _user_select_sql
+
+    if _user_select_sql is None:
+        columns = [
+            'id', 'organization_id', 'email', 'first_name', 'last_name', 'role',
+            'permissions', 'can_switch_organizations', 'current_organization_id', 'active'
+        ]
+        if 'last_password_change' in {row[1] for row in conn.execute("PRAGMA table_info(users)")}:
+            columns.append('last_password_change')
+        user_columns = ', '.join(f"u.{column}" for column in columns)
+        _user_select_sql = (
+            f"SELECT {user_columns}, {_org_summary_columns('o')} FROM users u "
+            "LEFT JOIN organizations o ON o.id = u.organization_id AND o.active = 1 "
+            "WHERE u.id = ? AND u.active = 1"
+        )
+    return _user_select_sql
+
+def _load_current_user(user_id):
+    """Query the active user row and validate the session's password timestamp"""
+    conn = get_master_db()
+    row = conn.execute(_get_user_select_sql(conn), (user_id,)).fetchone()
 
     if not row:
         return None
 
-    user = dict(row)
+    user = {}
+    org = {}
+    for key in row.keys():
+        if key.startswith('o_'):
+            org[key[2:]] = row[key]
+        else:
+            user[key] = row[key]
+
+    # Prime the organization cache from the joined columns
+    org_id = user['organization_id']
+    if org_id and not _org_cache_get('id', org_id)[0]:
+        _org_cache_put('id', org_id, OrgRecord(org) if org['id'] is not None else None)
 
     # Check if password was changed - invalidate session if timestamps don't match
     # Only if the column exists
@@ -70,100 +312,192 @@ def get_current_user():
 
     return user
 
+@_request_memoized
 def get_organization_by_id(org_id):
     """Get organization by ID from master database"""
     if not org_id:
         return None
 
-    conn = get_master_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, organization_name, slug, db_filename, owner_name, owner_email,
-               plan_type, subscription_status, active, logo_url, features
-        FROM organizations
-        WHERE id = ? AND active = 1
-    """, (org_id,))
-
-    row = cursor.fetchone()
-    conn.close()
+    hit, org = _org_cache_get('id', org_id)
+    if hit:
+        return org
 
-    if not row:
-        return None
+    conn = get_master_db()
+    row = conn.execute(_SQL_ORG_BY_ID, (org_id,)).fetchone()
 
-    return dict(row)
+    org = OrgRecord(row) if row else None
+    _org_cache_put('id', org_id, org)
+    return org
 
+@_request_memoized
 def get_organization_by_slug(slug):
     """Get organization by subdomain slug from master database"""
     if not slug:
         return None
 
-    conn = get_master_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, organization_name, slug, db_filename, owner_name, owner_email,
-               plan_type, subscription_status, active, logo_url, features
-        FROM organizations
-        WHERE slug = ? AND active = 1
-    """, (slug,))
-
-    row = cursor.fetchone()
-    conn.close()
+    hit, org = _org_cache_get('slug', slug)
+    if hit:
+        return org
 
-    if not row:
-        return None
+    conn = get_master_db()
+    row = conn.execute(_SQL_ORG_BY_SLUG, (slug,)).fetchone()
 
-    return dict(row)
+    org = OrgRecord(row) if row else None
+    _org_cache_put('slug', slug, org)
+    return org
 
 
+@_request_memoized
 def get_organization_full(org_id):
     """Get full organization record (all columns) for storefront rendering."""
     if not org_id:
         return None
 
-    conn = get_master_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM organizations WHERE id = ? AND active = 1", (org_id,))
-    row = cursor.fetchone()
-    conn.close()
+    hit, org = _org_cache_get('full', org_id)
+    if hit:
+        return org
 
-    if not row:
-        return None
+    conn = get_master_db()
+    row = conn.execute(_SQL_ORG_FULL, (org_id,)).fetchone()
 
-    return dict(row)
+    org = OrgRecord(row) if row else None
+    _org_cache_put('full', org_id, org)
+    return org
 
 
+@_request_memoized
 def get_organization_by_custom_domain(domain):
     """Get organization by custom domain from master database."""
     if not domain:
         return None
 
+    hit, org = _org_cache_get('domain', domain)
+    if hit:
+        return org
+
     conn = get_master_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            SELECT * FROM organizations
-            WHERE custom_domain = ? AND active = 1
-        """, (domain,))
-        row = cursor.fetchone()
-    except Exception:
+    if HAS_CUSTOM_DOMAIN_COL:
+        row = conn.execute(_SQL_ORG_BY_DOMAIN, (domain,)).fetchone()
+    else:
         row = None
-    conn.close()
 
-    if not row:
+    org = OrgRecord(row) if row else None
+    _org_cache_put('domain', domain, org)
+    return org
+
+def _org_summary_record(row):
+    """
+    OrgRecord with only the summary columns of a full organizations row, as
+    get_organization_by_id/_by_slug would have selected them, so the 'id' and
+    'slug' cache entries look the same whichever path filled them.
+    """
+    return OrgRecord({
+        column: row[column] if column != 'features' or HAS_FEATURES_COL else None
+        for column in _ORG_SUMMARY_COLUMNS
+    })
+
+def _bulk_resolve_org(org_id=None, slugs=(), domain=None):
+    """
+    Prime the organization cache for every lookup set_tenant_context is about
+    to make (user org by id, subdomain/storefront slugs, custom domain) with
+    a single master.db query. Keys that are already cached are skipped.
+
+    The query selects every column: 'full' and 'domain' entries keep the whole
+    row, 'id' and 'slug' entries get the summary projection.
+    """
+    wanted = []
+    if org_id and not _org_cache_get('id', org_id)[0]:
+        wanted.append(('id', org_id))
+    for slug in dict.fromkeys(slugs):
+        if slug and not _org_cache_get('slug', slug)[0]:
+            wanted.append(('slug', slug))
+    if domain and not _org_cache_get('domain', domain)[0]:
+        wanted.append(('custom_domain', domain))
+
+    if not wanted:
+        return
+
+    conn = get_master_db()
+    if not HAS_CUSTOM_DOMAIN_COL and domain:
+        # Pre-migration schema - no organization can match a custom domain
+        _org_cache_put('domain', domain, None)
+        wanted = [(column, value) for column, value in wanted if column != 'custom_domain']
+        if not wanted:
+            return
+
+    where = ' OR '.join(f"{column} = ?" for column, _ in wanted)
+    rows = conn.execute(
+        f"SELECT * FROM organizations WHERE active = 1 AND ({where})",
+        [value for _, value in wanted]
+    ).fetchall()
+
+    orgs = [OrgRecord(row) for row in rows]
+    for column, value in wanted:
+        org = next((o for o in orgs if str(o[column]) == str(value)), None)
+        summary = _org_summary_record(org) if org else None
+        if column == 'id':
+            _org_cache_put('id', value, summary)
+            _org_cache_put('full', value, org)
+        elif column == 'slug':
+            _org_cache_put('slug', value, summary)
+            if org:
+                _org_cache_put('full', org['id'], org)
+        else:
+            _org_cache_put('domain', value, org)
+
+def _storefront_slug(path):
+    """Return <slug> for /s/<slug>/... storefront paths, else None"""
+    if not path.startswith('/s/'):
         return None
+    return _parse_storefront_slug(path)
 
-    return dict(row)
+@lru_cache(maxsize=4096)
+def _parse_storefront_slug(path):
+    """Slug segment of a /s/ path (cached - storefront pages repeat constantly)"""
+    return path.split('/', 3)[2] or None
 
+@lru_cache(maxsize=8192)
 def get_subdomain_from_host(host):
-    """Extract subdomain from hostname"""
+    """Extract subdomain from hostname (cached - the same hosts repeat constantly)"""
     if 'localhost' in host or '127.0.0.1' in host:
         return None
 
-    parts = host.split('.')
-    if len(parts) >= 3:
-        return parts[0]
+    # subdomain.domain.tld: needs at least two dots, no list allocation
+    first_dot = host.find('.')
+    if first_dot < 0 or host.find('.', first_dot + 1) < 0:
+        return None
+
+    return host[:first_dot]
+
+@lru_cache(maxsize=4096)
+def _parse_permissions(permissions_json):
+    """
+    (_perms, _cat_wild) frozensets for a users.permissions JSON string.
+
+    Keyed by the column value itself, so the user row still loaded on every
+    request skips json.loads for the handful of distinct permission sets in
+    use, and an edited grant is simply a new key - nothing to invalidate.
+    """
+    try:
+        user_permissions = json.loads(permissions_json) or []
+    except ValueError:
+        user_permissions = []
+    return (frozenset(user_permissions),
+            frozenset(p[:-2] for p in user_permissions if p.endswith('.*')))
+
+def _compile_permissions(user):
+    """
+    (_perms, _cat_wild) frozensets for user['permissions'] (JSON list):
+    _perms for exact/wildcard checks, _cat_wild for 'category.*' grants.
+
+    The user dict is left untouched - it is shared and may be serialized.
+    """
+    user_permissions = user.get('permissions') or '[]'
+    if isinstance(user_permissions, str):
+        return _parse_permissions(user_permissions)
 
-    return None
+    return (frozenset(user_permissions),
+            frozenset(p[:-2] for p in user_permissions if p.endswith('.*')))
 
 def user_has_permission(user, required_permission):
     """Check if user has a specific permission"""
@@ -174,13 +508,8 @@ def user_has_permission(user, required_permission):
     if user.get('role') == 'super_admin' and user.get('can_switch_organizations'):
         return True
 
-    # Check user's permissions
-    user_permissions = user.get('permissions', '[]')
-    if isinstance(user_permissions, str):
-        try:
-            user_permissions = json.loads(user_permissions)
-        except:
-            user_permissions = []
+    # JSON strings hit the _parse_permissions cache; g holds the sets for g.user
+    user_permissions, cat_wild = _compile_permissions(user)
 
     # Wildcard permission
     if '*' in user_permissions:
@@ -191,11 +520,47 @@ def user_has_permission(user, required_permission):
         return True
 
     # Category wildcard
-    category = required_permission.split('.')[0]
-    if f"{category}.*" in user_permissions:
+    return required_permission.split('.', 1)[0] in cat_wild
+
+def _set_request_permissions(user):
+    """Compile g.user's permission sets once and keep them on g for the decorators"""
+    g._perms_for = user
+    g._perms, g._perm_cats = _compile_permissions(user)
+    g._perm_all = ('*' in g._perms
+                   or (user['role'] == 'super_admin' and bool(user['can_switch_organizations'])))
+
+def _has_permission(permission):
+    """user_has_permission(g.user, permission) using the per-request sets on g"""
+    if g._perms_for is not g.user:
+        # g.user was replaced after set_tenant_context - check it directly
+        return user_has_permission(g.user, permission)
+    return (g._perm_all
+            or permission in g._perms
+            or permission.split('.', 1)[0] in g._perm_cats)
+
+def _is_non_storefront_host(host):
+    """True if host recently resolved to no website-enabled custom domain"""
+    with _org_cache_lock:
+        expires_at = _non_storefront_hosts.get(host)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del _non_storefront_hosts[host]
+            return False
         return True
 
-    return False
+
+def _mark_non_storefront_host(host):
+    """Remember that host serves no custom-domain storefront"""
+    with _org_cache_lock:
+        if len(_non_storefront_hosts) >= NON_STOREFRONT_HOST_MAXSIZE:
+            _non_storefront_hosts.clear()
+        _non_storefront_hosts[host] = time.monotonic() + NON_STOREFRONT_HOST_TTL
+
+
+# Path prefixes served without tenant context (see set_tenant_context)
+NO_TENANT_CONTEXT_PREFIXES = ('/static/', '/favicon', '/health')
+
 
 def _resolve_storefront():
     """
@@ -209,26 +574,28 @@ def _resolve_storefront():
     host = request.host.split(':')[0]  # Strip port
     path = request.path
 
+    # Known non-storefront host (API calls, dashboards, static assets) and no
+    # /s/<slug>/ path - nothing to resolve
+    if _is_non_storefront_host(host) and not path.startswith('/s/'):
+        return
+
     # 1. Check custom domain
     org = get_organization_by_custom_domain(host)
     if org and org.get('website_enabled'):
         g.storefront_org = org
-        from db_manager import get_org_db_path
-        g.storefront_db_path = get_org_db_path(org['id'])
+        g.storefront_db_path = org.db_path
         return
+    _mark_non_storefront_host(host)
 
     # 2. Check /s/<slug>/ path
-    if path.startswith('/s/'):
-        parts = path.split('/')
-        if len(parts) >= 3 and parts[2]:
-            slug = parts[2]
-            org_basic = get_organization_by_slug(slug)
-            if org_basic:
-                org = get_organization_full(org_basic['id'])
-                if org and org.get('website_enabled'):
-                    g.storefront_org = org
-                    from db_manager import get_org_db_path
-                    g.storefront_db_path = get_org_db_path(org['id'])
+    slug = _storefront_slug(path)
+    if slug:
+        org_basic = get_organization_by_slug(slug)
+        if org_basic:
+            org = get_organization_full(org_basic['id'])
+            if org and org.get('website_enabled'):
+                g.storefront_org = org
+                g.storefront_db_path = org.db_path
 
 
 def set_tenant_context():
@@ -237,11 +604,48 @@ def set_tenant_context():
     Sets g.user, g.organization, and g.org_db_path
     Also resolves g.storefront_org and g.storefront_db_path for public storefront routes.
     """
-    # Resolve storefront FIRST (works for unauthenticated visitors)
-    _resolve_storefront()
+    # Defaults first, so the decorators can test `g.user is None` directly
+    g.user = None
+    g.organization = None
+    g.org_db_path = None
+    g.is_super_admin = False
+    g.is_organization_admin = False
+    g.is_employee = False
+    g.storefront_org = None
+    g.storefront_db_path = None
+    # Read once for every stacked auth decorator (parses Content-Type)
+    g._is_json = request.is_json
+    g._perms_for = None
+
+    # Static assets, health checks and CORS preflights (answered by Flask's
+    # automatic OPTIONS response, no view runs) never use tenant context
+    if (request.method == 'OPTIONS' or request.endpoint == 'static'
+            or request.path.startswith(NO_TENANT_CONTEXT_PREFIXES)):
+        return
 
     user = get_current_user()
 
+    # Fetch every organization this request may touch in one master.db query
+    if user:
+        if user['role'] == 'super_admin' and user['can_switch_organizations']:
+            prefetch_org_id = session.get('current_organization_id') or user.get('current_organization_id')
+        else:
+            prefetch_org_id = user['organization_id']
+    elif 'clock_employee_id' in session:
+        prefetch_org_id = session.get('clock_org_id') or session.get('organization_id')
+    else:
+        prefetch_org_id = None
+    subdomain = get_subdomain_from_host(request.host)
+    host = request.host.split(':')[0]
+    _bulk_resolve_org(
+        prefetch_org_id,
+        (_storefront_slug(request.path), subdomain if subdomain != 'admin' else None),
+        None if _is_non_storefront_host(host) else host
+    )
+
+    # Resolve storefront (works for unauthenticated visitors)
+    _resolve_storefront()
+
     # Check for clock terminal session (employee code login)
     if not user and 'clock_employee_id' in session and 'clock_org_id' in session:
         # Set context for clock terminal with employee info
@@ -261,23 +665,17 @@ def set_tenant_context():
         g.organization = get_organization_by_id(org_id)
 
         if g.organization:
-            from db_manager import get_org_db_path
-            g.org_db_path = get_org_db_path(g.organization['id'])
+            g.org_db_path = g.organization.db_path
         else:
             g.org_db_path = None
         return
 
     if not user:
-        g.user = None
-        g.organization = None
-        g.org_db_path = None
-        g.is_super_admin = False
-        g.is_organization_admin = False
-        g.is_employee = False
         return
 
-    # Set user
+    # Set user (permission JSON parsed once here, not per permission check)
     g.user = user
+    _set_request_permissions(user)
 
     # Determine user type
     g.is_super_admin = (user['role'] == 'super_admin' and user['can_switch_organizations'])
@@ -298,15 +696,11 @@ def set_tenant_context():
 
     # Set database path for business data queries
     if g.organization:
-        from db_manager import get_org_db_path
-        g.org_db_path = get_org_db_path(g.organization['id'])
+        g.org_db_path = g.organization.db_path
     else:
         g.org_db_path = None
 
-    # Detect subdomain and enforce organization
-    host = request.host
-    subdomain = get_subdomain_from_host(host)
-
+    # Enforce organization from subdomain (detected above)
     if subdomain and subdomain != 'admin':
         org = get_organization_by_slug(subdomain)
 
@@ -320,11 +714,103 @@ def set_tenant_context():
 
             # Set organization from subdomain
             g.organization = org
-            from db_manager import get_org_db_path
-            g.org_db_path = get_org_db_path(org['id'])
+            g.org_db_path = org.db_path
+
+# ---------------------------------------------------------------------------
+# Audit log writer
+# log_audit only enqueues the row; a daemon thread drains the queue and
+# writes up to AUDIT_BATCH_MAX rows per transaction, waiting at most
+# AUDIT_FLUSH_INTERVAL seconds to fill a batch. Requests no longer pay
+# for the insert + fsync or serialize on master.db's writer lock.
+# ---------------------------------------------------------------------------
+AUDIT_BATCH_MAX = 100
+AUDIT_FLUSH_INTERVAL = 0.2
+
+_SQL_INSERT_AUDIT = (
+    "INSERT INTO audit_log "
+    "(organization_id, user_id, action, entity_type, entity_id, changes, ip_address, user_agent) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_audit_queue = queue.Queue()
+_audit_writer = None
+_audit_writer_lock = threading.Lock()
+
+
+def _open_audit_db():
+    """Writer-thread connection to master.db (WAL, synchronous=NORMAL)"""
+    conn = _open_master_db()
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _write_audit_batch(conn, rows):
+    """Insert a batch of audit rows in one IMMEDIATE transaction"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(_SQL_INSERT_AUDIT, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _audit_writer_loop():
+    """Drain _audit_queue forever, one batch per transaction"""
+    conn = None
+    while True:
+        rows = [_audit_queue.get()]
+        deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL
+        while len(rows) < AUDIT_BATCH_MAX:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                rows.append(_audit_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        try:
+            if conn is None:
+                conn = _open_audit_db()
+            _write_audit_batch(conn, rows)
+        except Exception as e:
+            print(f"Warning: audit log write failed ({len(rows)} rows): {type(e).__name__}: {e}")
+            if conn is not None:
+                conn.close()
+                conn = None
+        finally:
+            for _ in rows:
+                _audit_queue.task_done()
+
+
+def _ensure_audit_writer():
+    """Start the writer thread on first use (after any gunicorn fork)"""
+    global _audit_writer
+
+    if _audit_writer is not None and _audit_writer.is_alive():
+        return
+    with _audit_writer_lock:
+        if _audit_writer is None or not _audit_writer.is_alive():
+            _audit_writer = threading.Thread(
+                target=_audit_writer_loop, name='audit-log-writer', daemon=True
+            )
+            _audit_writer.start()
+
+
+def flush_audit_log():
+    """Block until every queued audit row has been written (or failed)"""
+    if _audit_writer is not None and _audit_writer.is_alive():
+        _audit_queue.join()
+
+
+# Don't lose queued rows on a clean shutdown
+atexit.register(flush_audit_log)
+
 
 def log_audit(action, entity_type=None, entity_id=None, changes=None):
-    """Log user action to audit log in master database"""
+    """Log user action to audit log in master database (written asynchronously)"""
     if not hasattr(g, 'user') or not g.user:
         return
 
@@ -333,37 +819,65 @@ def log_audit(action, entity_type=None, entity_id=None, changes=None):
 
     changes_json = json.dumps(changes) if changes else None
 
-    conn = get_master_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO audit_log
-        (organization_id, user_id, action, entity_type, entity_id, changes, ip_address, user_agent)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    # Read the WSGI environ directly (same values as remote_addr / headers)
+    environ = request.environ
+
+    _ensure_audit_writer()
+    _audit_queue.put((
         org_id,
         user_id,
         action,
         entity_type,
         entity_id,
         changes_json,
-        request.remote_addr,
-        request.headers.get('User-Agent')
+        environ.get('REMOTE_ADDR'),
+        environ.get('HTTP_USER_AGENT')
     ))
-    conn.commit()
-    conn.close()
 
 # ==========================================
 # AUTHENTICATION DECORATORS (Same as before)
+# g.user / g.organization / g.is_* are always set by set_tenant_context
+# (defaults first), so guards compare against None instead of hasattr().
 # ==========================================
 
+def _error_body(error, **extra):
+    """Pre-serialized {'error': ...} JSON payload"""
+    return json.dumps({'error': error, **extra}).encode()
+
+# (body, status) pairs serialized once at import. A fresh Response is built
+# per failure - Response objects are mutable (cookies, after_request hooks)
+# and must not be shared between requests.
+_ERR_AUTH_REQUIRED = (_error_body('Authentication required'), 401)
+_ERR_SUPER_ADMIN_REQUIRED = (_error_body('Super admin access required'), 403)
+_ERR_SUPER_ADMIN_ONLY = (_error_body('Access denied - Super admin only'), 403)
+_ERR_ORG_CONTEXT_REQUIRED = (_error_body('Organization context required'), 400)
+_ERR_NO_ORG_SELECTED = (_error_body('No organization selected'), 400)
+_ERR_ORG_ADMIN_REQUIRED = (_error_body('Organization admin access required'), 403)
+_ERR_ADMIN_ONLY = (_error_body('Access denied - Admin only'), 403)
+_ERR_ACCESS_DENIED = (_error_body('Access denied'), 403)
+_ERR_EMPLOYEE_NOT_FOUND = (_error_body('Employee record not found'), 404)
+_ERR_OWN_DATA_ONLY = (_error_body('Access denied - can only view own data'), 403)
+_ERR_INVALID_ID = (_error_body('Invalid id'), 400)
+
+def _error_response(error):
+    """JSON Response for a pre-serialized (body, status) pair"""
+    body, status = error
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+def _auth_fail(with_next=False):
+    """401 JSON for API calls, otherwise redirect to the login page"""
+    if g._is_json:
+        return _error_response(_ERR_AUTH_REQUIRED)
+    if with_next:
+        return redirect(url_for('auth.login', next=request.url))
+    return redirect(url_for('auth.login'))
+
 def login_required(f):
     """Require user to be logged in"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not hasattr(g, 'user') or not g.user:
-            if request.is_json:
-                return jsonify({'error': 'Authentication required'}), 401
-            return redirect(url_for('auth.login', next=request.url))
+        if g.user is None:
+            return _auth_fail(with_next=True)
         return f(*args, **kwargs)
     return decorated_function
 
@@ -371,15 +885,13 @@ def super_admin_required(f):
     """Require super admin role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not hasattr(g, 'user') or not g.user:
-            if request.is_json:
-                return jsonify({'error': 'Authentication required'}), 401
-            return redirect(url_for('auth.login'))
+        if g.user is None:
+            return _auth_fail()
 
         if not g.is_super_admin:
-            if request.is_json:
-                return jsonify({'error': 'Super admin access required'}), 403
-            return jsonify({'error': 'Access denied - Super admin only'}), 403
+            if g._is_json:
+                return _error_response(_ERR_SUPER_ADMIN_REQUIRED)
+            return _error_response(_ERR_SUPER_ADMIN_ONLY)
 
         return f(*args, **kwargs)
     return decorated_function
@@ -388,10 +900,10 @@ def organization_required(f):
     """Require organization context to be set"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not hasattr(g, 'organization') or not g.organization:
-            if request.is_json:
-                return jsonify({'error': 'Organization context required'}), 400
-            return jsonify({'error': 'No organization selected'}), 400
+        if g.organization is None:
+            if g._is_json:
+                return _error_response(_ERR_ORG_CONTEXT_REQUIRED)
+            return _error_response(_ERR_NO_ORG_SELECTED)
         return f(*args, **kwargs)
     return decorated_function
 
@@ -399,95 +911,142 @@ def organization_admin_required(f):
     """Require organization admin role (or super admin)"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not hasattr(g, 'user') or not g.user:
-            if request.is_json:
-                return jsonify({'error': 'Authentication required'}), 401
-            return redirect(url_for('auth.login'))
+        if g.user is None:
+            return _auth_fail()
 
         if not (g.is_super_admin or g.is_organization_admin):
-            if request.is_json:
-                return jsonify({'error': 'Organization admin access required'}), 403
-            return jsonify({'error': 'Access denied - Admin only'}), 403
+            if g._is_json:
+                return _error_response(_ERR_ORG_ADMIN_REQUIRED)
+            return _error_response(_ERR_ADMIN_ONLY)
 
         return f(*args, **kwargs)
     return decorated_function
 
 def permission_required(permission):
     """Require specific permission"""
+    # Denial payloads only depend on the permission - serialize them once
+    denied_json = (_error_body('Permission denied', required_permission=permission), 403)
+    denied = (_error_body(f'Access denied - {permission} required'), 403)
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not hasattr(g, 'user') or not g.user:
-                if request.is_json:
-                    return jsonify({'error': 'Authentication required'}), 401
-                return redirect(url_for('auth.login'))
-
-            if not user_has_permission(g.user, permission):
-                if request.is_json:
-                    return jsonify({
-                        'error': f'Permission denied',
-                        'required_permission': permission
-                    }), 403
-                return jsonify({'error': f'Access denied - {permission} required'}), 403
+            if g.user is None:
+                return _auth_fail()
+
+            if not _has_permission(permission):
+                if g._is_json:
+                    return _error_response(denied_json)
+                return _error_response(denied)
 
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+def guard(*, org=False, admin=False, super_admin=False, perm=None):
+    """
+    Fused auth decorator - runs the checks of a decorator stack in one frame.
+
+    @guard(org=True, perm='payroll.view') is equivalent to
+    @login_required @organization_required @permission_required('payroll.view'),
+    with the same responses in the same order:
+        login -> super_admin -> org -> admin -> perm
+    """
+    if perm is not None:
+        perm_denied_json = (_error_body('Permission denied', required_permission=perm), 403)
+        perm_denied = (_error_body(f'Access denied - {perm} required'), 403)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if g.user is None:
+                return _auth_fail(with_next=True)
+
+            if super_admin and not g.is_super_admin:
+                if g._is_json:
+                    return _error_response(_ERR_SUPER_ADMIN_REQUIRED)
+                return _error_response(_ERR_SUPER_ADMIN_ONLY)
+
+            if org and g.organization is None:
+                if g._is_json:
+                    return _error_response(_ERR_ORG_CONTEXT_REQUIRED)
+                return _error_response(_ERR_NO_ORG_SELECTED)
+
+            if admin and not (g.is_super_admin or g.is_organization_admin):
+                if g._is_json:
+                    return _error_response(_ERR_ORG_ADMIN_REQUIRED)
+                return _error_response(_ERR_ADMIN_ONLY)
+
+            if perm is not None and not _has_permission(perm):
+                if g._is_json:
+                    return _error_response(perm_denied_json)
+                return _error_response(perm_denied)
+
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def _positive_int(value):
+    """value as a positive int, or None if it isn't one"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+def _current_employee_id():
+    """
+    Employee id linked to g.user in the org database. Resolved lazily once
+    per request and kept on g (keyed by user id), so repeated own_data_only
+    checks in the same request don't query the org database again.
+    """
+    user_id = g.user['id']
+    cached = g.get('_employee_id')
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+
+    row = get_request_org_db().execute(_SQL_EMPLOYEE_ID_FOR_USER, (user_id,)).fetchone()
+
+    employee_id = row['id'] if row else None
+    g._employee_id = (user_id, employee_id)
+    return employee_id
+
 def own_data_only(entity_type, id_param='id'):
     """Require user to only access their own data (for employees)"""
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not hasattr(g, 'user') or not g.user:
-                return jsonify({'error': 'Authentication required'}), 401
-
-            # Super admin and org admin can access any data
+            # Super admin and org admin can access any data (no DB work)
             if g.is_super_admin or g.is_organization_admin:
                 return f(*args, **kwargs)
 
-            # Employee: verify they're accessing their own data
-            entity_id = kwargs.get(id_param)
-
-            # Get user's employee record from organization database
-            from db_manager import get_org_db
-            conn = get_org_db()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id FROM employees
-                WHERE user_id = ?
-            """, (g.user['id'],))
-
-            employee = cursor.fetchone()
-            conn.close()
-
-            if not employee:
-                return jsonify({'error': 'Employee record not found'}), 404
-
-            employee_id = employee['id']
-
-            # Verify access based on entity type
-            if entity_type == 'employee':
-                if int(entity_id) != employee_id:
-                    return jsonify({'error': 'Access denied - can only view own data'}), 403
-            elif entity_type == 'paycheck':
-                conn = get_org_db()
-                cursor = conn.cursor()
-                cursor.execute("SELECT employee_id FROM paychecks WHERE id = ?", (entity_id,))
-                paycheck = cursor.fetchone()
-                conn.close()
-
-                if not paycheck or paycheck['employee_id'] != employee_id:
-                    return jsonify({'error': 'Access denied'}), 403
-            elif entity_type == 'time_entry':
-                conn = get_org_db()
-                cursor = conn.cursor()
-                cursor.execute("SELECT employee_id FROM time_entries WHERE id = ?", (entity_id,))
-                entry = cursor.fetchone()
-                conn.close()
+            if g.user is None:
+                return _error_response(_ERR_AUTH_REQUIRED)
 
-                if not entry or entry['employee_id'] != employee_id:
-                    return jsonify({'error': 'Access denied'}), 403
+            # Employee: verify they're accessing their own data
+            own_sql = _OWN_SQL.get(entity_type)
+            if own_sql or entity_type == 'employee':
+                # Reject malformed ids before touching the database
+                entity_id = _positive_int(kwargs.get(id_param))
+                if entity_id is None:
+                    return _error_response(_ERR_INVALID_ID)
+
+            if own_sql:
+                # Employee lookup + ownership check in one query
+                # (request-scoped connection, released at teardown)
+                row = get_request_org_db().execute(own_sql, (entity_id, g.user['id'])).fetchone()
+                if row is None:
+                    # Only on denial: keep 404 for users with no employee record
+                    if _current_employee_id() is None:
+                        return _error_response(_ERR_EMPLOYEE_NOT_FOUND)
+                    return _error_response(_ERR_ACCESS_DENIED)
+            else:
+                employee_id = _current_employee_id()
+                if employee_id is None:
+                    return _error_response(_ERR_EMPLOYEE_NOT_FOUND)
+
+                if entity_type == 'employee' and entity_id != employee_id:
+                    return _error_response(_ERR_OWN_DATA_ONLY)
 
             return f(*args, **kwargs)
         return decorated_function
@@ -8,107 +8,125 @@ Migration: Add Barcode Support
 import sqlite3
 import os
 
-def column_exists(cursor, table, column):
-    """Check if a column exists in a table"""
-    cursor.execute(f"PRAGMA table_info({table})")
-    columns = [row[1] for row in cursor.fetchall()]
+# Applied to the migration connection before any DDL
+MIGRATION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+def column_exists(cursor, table, column, cols_cache=None):
+    """Check if a column exists in a table
+
+    cols_cache maps table -> set of column names and is owned by the caller,
+    so one migrate() run probes each table once and never sees another
+    database's columns.
+    """
+    columns = cols_cache.get(table) if cols_cache is not None else None
+    if columns is None:
+        # Bound table name: one prepared statement serves every table
+        cursor.execute("SELECT name FROM pragma_table_info(?)", (table,))
+        columns = {row[0] for row in cursor.fetchall()}
+        if cols_cache is not None:
+            cols_cache[table] = columns
     return column in columns
 
+def add_column_sql(table, column, column_def):
+    """ALTER TABLE ADD COLUMN statement, run inside the migration transaction"""
+    return f"ALTER TABLE {table} ADD COLUMN {column} {column_def};"
+
+# Tables and indexes, applied in the same executescript as the ALTERs inside
+# a single transaction (one parse pass, one commit). Everything is IF NOT EXISTS.
+_DDL = """
+CREATE INDEX IF NOT EXISTS idx_ingredients_barcode ON ingredients(barcode);
+CREATE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode);
+
+-- External API lookup results
+CREATE TABLE IF NOT EXISTS barcode_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    barcode TEXT NOT NULL,
+    data_source TEXT NOT NULL,
+    product_name TEXT,
+    brand TEXT,
+    category TEXT,
+    unit_of_measure TEXT,
+    quantity TEXT,
+    image_url TEXT,
+    raw_data TEXT,
+    last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(barcode, data_source)
+);
+CREATE INDEX IF NOT EXISTS idx_barcode_cache_barcode ON barcode_cache(barcode);
+CREATE INDEX IF NOT EXISTS idx_barcode_cache_source ON barcode_cache(data_source);
+
+-- Free tier limit tracking
+CREATE TABLE IF NOT EXISTS barcode_api_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    api_name TEXT NOT NULL,
+    request_date TEXT NOT NULL,
+    request_count INTEGER DEFAULT 1,
+    UNIQUE(api_name, request_date)
+);
+CREATE INDEX IF NOT EXISTS idx_barcode_api_usage_date ON barcode_api_usage(api_name, request_date);
+
+INSERT OR IGNORE INTO schema_migrations (migration_name) VALUES ('add_barcode_support');
+"""
+
+MIGRATION_NAME = 'add_barcode_support'
+
+# Same layout as run_migrations.py / db_manager
+_SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    migration_name TEXT UNIQUE NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    checksum TEXT
+)
+"""
+
 def migrate():
     db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'inventory.db')
-    conn = sqlite3.connect(db_path)
+    # Autocommit: the transaction is opened explicitly in the script below
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
 
+    # WAL + relaxed sync: DDL commits don't fsync a rollback journal each time
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
+
     print("Starting barcode support migration...")
 
     try:
-        # Add barcode column to ingredients table (if not exists)
-        print("1. Checking ingredients table...")
-        if not column_exists(cursor, 'ingredients', 'barcode'):
-            print("   Adding barcode column to ingredients table...")
-            cursor.execute("""
-                ALTER TABLE ingredients ADD COLUMN barcode TEXT
-            """)
-            print("   ✓ Ingredients barcode column added")
-        else:
-            print("   ✓ Ingredients barcode column already exists")
-
-        # Create index on ingredients barcode
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ingredients_barcode
-            ON ingredients(barcode)
-        """)
-
-        # Add barcode column to products table (if not exists)
-        print("2. Checking products table...")
-        if not column_exists(cursor, 'products', 'barcode'):
-            print("   Adding barcode column to products table...")
-            cursor.execute("""
-                ALTER TABLE products ADD COLUMN barcode TEXT
-            """)
-            print("   ✓ Products barcode column added")
-        else:
-            print("   ✓ Products barcode column already exists")
-
-        # Create index on products barcode
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_products_barcode
-            ON products(barcode)
-        """)
-
-        # Create barcode_cache table for external API results
-        print("3. Creating barcode_cache table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS barcode_cache (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                barcode TEXT NOT NULL,
-                data_source TEXT NOT NULL,
-                product_name TEXT,
-                brand TEXT,
-                category TEXT,
-                unit_of_measure TEXT,
-                quantity TEXT,
-                image_url TEXT,
-                raw_data TEXT,
-                last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(barcode, data_source)
-            )
-        """)
-
-        # Create index on barcode for fast lookups
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_barcode_cache_barcode
-            ON barcode_cache(barcode)
-        """)
-
-        # Create index on data_source
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_barcode_cache_source
-            ON barcode_cache(data_source)
-        """)
-
-        print("   ✓ Barcode cache table created with indexes")
-
-        # Create barcode_api_usage table to track free tier limits
-        print("4. Creating barcode_api_usage tracking table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS barcode_api_usage (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                api_name TEXT NOT NULL,
-                request_date TEXT NOT NULL,
-                request_count INTEGER DEFAULT 1,
-                UNIQUE(api_name, request_date)
-            )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_barcode_api_usage_date
-            ON barcode_api_usage(api_name, request_date)
-        """)
-
-        print("   ✓ API usage tracking table created")
-
-        conn.commit()
+        # Already applied - nothing to probe or ALTER
+        cursor.execute(_SCHEMA_MIGRATIONS_DDL)
+        cursor.execute(
+            "SELECT 1 FROM schema_migrations WHERE migration_name = ?", (MIGRATION_NAME,)
+        )
+        if cursor.fetchone():
+            print("✓ Barcode support migration already applied")
+            return
+
+        # ALTER TABLE has no IF NOT EXISTS - add columns only where missing
+        alters = []
+        cols_cache = {}
+        for step, table in enumerate(('ingredients', 'products'), start=1):
+            print(f"{step}. Checking {table} table...")
+            if not column_exists(cursor, table, 'barcode', cols_cache):
+                print(f"   Adding barcode column to {table} table...")
+                alters.append(add_column_sql(table, 'barcode', 'TEXT'))
+            else:
+                print(f"   ✓ {table.capitalize()} barcode column already exists")
+
+        print("3. Creating barcode_cache and barcode_api_usage tables...")
+        # ALTERs, tables, indexes and the schema_migrations row commit together
+        # (SQLite DDL is transactional); executescript would commit any
+        # transaction opened outside the script, so BEGIN lives inside it
+        cursor.executescript("BEGIN IMMEDIATE;\n" + "\n".join(alters) + f"\n{_DDL}\nCOMMIT;")
+        if alters:
+            print("   ✓ Barcode columns added")
+        print("   ✓ Barcode indexes, cache table and API usage tracking table created")
+
         print("\n✅ Migration completed successfully!")
         print("\nNext steps:")
         print("- Restart the Flask app to load new endpoints")
@@ -117,7 +135,8 @@ def migrate():
 
     except sqlite3.Error as e:
         print(f"\n❌ Migration failed: {e}")
-        conn.rollback()
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         raise
 
     finally:
@@ -7,6 +7,21 @@ Adds password change tracking for session invalidation
 import sqlite3
 import os
 
+# Applied to the migration connection before any DDL
+MIGRATION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+_ADD_COLUMN_SQL = """
+BEGIN IMMEDIATE;
+ALTER TABLE users ADD COLUMN last_password_change TIMESTAMP;
+UPDATE users SET last_password_change = CURRENT_TIMESTAMP WHERE last_password_change IS NULL;
+COMMIT;
+"""
+
 def run_migration():
     """Add last_password_change column to users table in master.db"""
 
@@ -20,6 +35,10 @@ def run_migration():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    # WAL + relaxed sync: DDL commits don't fsync a rollback journal each time
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
+
     try:
         # Check if column already exists
         cursor.execute("PRAGMA table_info(users)")
@@ -30,25 +49,17 @@ def run_migration():
             conn.close()
             return True
 
-        # Add the column
+        # Add the column and backfill existing users in one transaction
+        # (SQLite rejects a CURRENT_TIMESTAMP default on ADD COLUMN, so the
+        # backfill stays an UPDATE - but it commits once, not per statement)
         print("📝 Adding 'last_password_change' column to users table...")
-        cursor.execute("""
-            ALTER TABLE users
-            ADD COLUMN last_password_change TIMESTAMP
-        """)
-
-        # Set default value for existing users
         print("📝 Setting default timestamp for existing users...")
-        cursor.execute("""
-            UPDATE users
-            SET last_password_change = CURRENT_TIMESTAMP
-            WHERE last_password_change IS NULL
-        """)
+        cursor.executescript(_ADD_COLUMN_SQL)
+        updated = cursor.execute("SELECT changes()").fetchone()[0]
 
-        conn.commit()
         print("✅ Migration completed successfully!")
         print(f"   - Added 'last_password_change' column")
-        print(f"   - Updated {cursor.rowcount} existing user records")
+        print(f"   - Updated {updated} existing user records")
 
         conn.close()
         return True
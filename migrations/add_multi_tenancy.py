@@ -9,165 +9,334 @@ Migration: Multi-Tenant Architecture with Three-Tier Access Control
 
 import sqlite3
 import os
-import hashlib
-import secrets
+import sys
+import json
+from collections import defaultdict
 from datetime import datetime
 
-def hash_password(password):
-    """Hash password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${pwd_hash}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.auth import hash_password
+
+_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'inventory.db')
+
+# Applied before the single migration transaction; foreign_keys can only be
+# toggled outside a transaction, so it is switched back on after COMMIT.
+# journal_mode is persistent in the file: migrate() puts the original mode
+# back when it finishes, so WAL only lasts for this run.
+MIGRATION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=OFF",
+)
+
+# Default permission sets, serialized once as compact JSON
+_ORG_ADMIN_PERMS = json.dumps([
+    "inventory.view", "inventory.create", "inventory.edit", "inventory.delete", "inventory.count",
+    "employees.view", "employees.create", "employees.edit", "employees.delete",
+    "payroll.view", "payroll.process", "payroll.approve",
+    "timeclock.view_all", "timeclock.edit_all",
+    "sales.view", "sales.create", "sales.edit", "sales.delete",
+    "products.view", "products.create", "products.edit", "products.delete",
+    "invoices.view", "invoices.create", "invoices.edit", "invoices.delete",
+    "reports.view", "reports.export",
+    "settings.view", "settings.edit", "settings.billing",
+    "users.view", "users.create", "users.edit", "users.delete"
+], separators=(",", ":"))
+
+_EMPLOYEE_PERMS = json.dumps([
+    "inventory.view", "inventory.count",
+    "employees.view_own", "employees.edit_own",
+    "payroll.view_own",
+    "timeclock.clockin", "timeclock.view_own",
+    "sales.view", "sales.create",
+    "products.view",
+    "invoices.view"
+], separators=(",", ":"))
+
+# (role_name, display_name, description, default_permissions)
+_ROLE_TEMPLATES = (
+    (
+        'super_admin',
+        'Super Administrator',
+        'Full access to all organizations and all features',
+        '["*"]'  # Wildcard = all permissions
+    ),
+    (
+        'organization_admin',
+        'Organization Administrator',
+        'Full access to all features within their organization',
+        _ORG_ADMIN_PERMS
+    ),
+    (
+        'employee',
+        'Employee',
+        'Limited access to view inventory, clock in/out, and view own information',
+        _EMPLOYEE_PERMS
+    ),
+)
+
+# ----------------------------------------------------------------------
+# Schema DDL: installed by a single executescript() parser pass
+# ----------------------------------------------------------------------
+
+def _fk(column, table, on_delete):
+    """FOREIGN KEY clause referencing another table's id"""
+    return f"FOREIGN KEY ({column}) REFERENCES {table}(id) ON DELETE {on_delete}"
+
+_ORGANIZATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS organizations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_name TEXT NOT NULL UNIQUE,
+        slug TEXT NOT NULL UNIQUE,
+        owner_name TEXT NOT NULL,
+        owner_email TEXT NOT NULL,
+        phone TEXT,
+        address TEXT,
+        city TEXT,
+        state TEXT,
+        zip_code TEXT,
+
+        -- Branding
+        logo_url TEXT,
+        primary_color TEXT DEFAULT '#2563eb',
+
+        -- Subscription & Billing
+        plan_type TEXT DEFAULT 'basic',
+        subscription_status TEXT DEFAULT 'active',
+        monthly_price REAL DEFAULT 99.00,
+        billing_email TEXT,
+
+        -- Limits
+        max_employees INTEGER DEFAULT 50,
+        max_products INTEGER DEFAULT 1000,
+        max_storage_mb INTEGER DEFAULT 5000,
+
+        -- Features
+        features TEXT,  -- JSON: ["barcode_scanning", "payroll", "invoicing"]
+
+        -- Status
+        active INTEGER DEFAULT 1 CHECK (active IN (0, 1)),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+_USERS_DDL = f"""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER,  -- NULL for super_admin, set for org users
+
+        -- Authentication
+        email TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+
+        -- Profile
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        phone TEXT,
+        avatar_url TEXT,
+
+        -- Three-Tier Role System
+        role TEXT NOT NULL,  -- super_admin, organization_admin, employee
+
+        -- Granular Permissions (JSON array)
+        permissions TEXT,  -- ["inventory.view", "payroll.process", "sales.create"]
+
+        -- Organization Switching (Super Admin Only)
+        can_switch_organizations INTEGER DEFAULT 0 CHECK (can_switch_organizations IN (0, 1)),  -- Only TRUE for super_admin
+        current_organization_id INTEGER,  -- For super admin: which org they're viewing
+
+        -- Status
+        active INTEGER DEFAULT 1 CHECK (active IN (0, 1)),
+        last_login TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        {_fk('organization_id', 'organizations', 'CASCADE')},
+        {_fk('current_organization_id', 'organizations', 'SET NULL')},
+
+        -- CRITICAL CONSTRAINT: Regular users MUST have organization_id
+        CHECK (
+            (role = 'super_admin' AND organization_id IS NULL) OR
+            (role != 'super_admin' AND organization_id IS NOT NULL)
+        )
+    )
+"""
+
+# STRICT tables need SQLite 3.37+
+_LOOKUP_TABLE_OPTIONS = ("WITHOUT ROWID, STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0)
+                         else "WITHOUT ROWID")
+
+_PERMISSION_DEFINITIONS_DDL = f"""
+    CREATE TABLE IF NOT EXISTS permission_definitions (
+        permission_key TEXT NOT NULL PRIMARY KEY,
+        category TEXT NOT NULL,  -- inventory, employees, payroll, sales, settings
+        description TEXT NOT NULL,
+        required_role TEXT,  -- Minimum role required (super_admin, organization_admin, employee)
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    ) {_LOOKUP_TABLE_OPTIONS}  -- keyed lookup table: one btree
+"""
 
-def column_exists(cursor, table, column):
-    """Check if a column exists in a table"""
-    cursor.execute(f"PRAGMA table_info({table})")
-    columns = [row[1] for row in cursor.fetchall()]
-    return column in columns
+_ROLE_TEMPLATES_DDL = f"""
+    CREATE TABLE IF NOT EXISTS role_templates (
+        role_name TEXT NOT NULL PRIMARY KEY,
+        display_name TEXT NOT NULL,
+        description TEXT,
+        default_permissions TEXT NOT NULL,  -- JSON array of permission keys
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    ) {_LOOKUP_TABLE_OPTIONS}  -- keyed lookup table: one btree
+"""
 
-def table_exists(cursor, table):
-    """Check if a table exists"""
-    cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
-    return cursor.fetchone() is not None
+_USER_SESSIONS_DDL = f"""
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        session_token TEXT NOT NULL UNIQUE,
+        organization_id INTEGER,  -- For super admin: which org they're currently viewing
+        ip_address TEXT,
+        user_agent TEXT,
+        expires_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        {_fk('user_id', 'users', 'CASCADE')},
+        {_fk('organization_id', 'organizations', 'SET NULL')}
+    )
+"""
+
+_ORGANIZATION_INVITATIONS_DDL = f"""
+    CREATE TABLE IF NOT EXISTS organization_invitations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER NOT NULL,
+        email TEXT NOT NULL,
+        role TEXT NOT NULL,  -- organization_admin or employee
+        permissions TEXT,  -- Custom permissions (optional)
+        invited_by INTEGER NOT NULL,  -- user_id who sent invitation
+        invitation_token TEXT NOT NULL UNIQUE,
+        status TEXT DEFAULT 'pending',  -- pending, accepted, expired, cancelled
+        expires_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        accepted_at TIMESTAMP,
+        {_fk('organization_id', 'organizations', 'CASCADE')},
+        {_fk('invited_by', 'users', 'CASCADE')}
+    )
+"""
+
+# Timestamps stay TIMESTAMP text: the app compares them against
+# date('now', ...) / DATE() and ISO strings, and an INTEGER column
+# always sorts below TEXT in SQLite, so those filters would match
+# nothing after an epoch-integer switch.
+_AUDIT_LOG_DDL = f"""
+    CREATE TABLE IF NOT EXISTS audit_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER,
+        user_id INTEGER,
+        action TEXT NOT NULL,  -- admin_entered_dashboard, created_product, deleted_employee, etc.
+        entity_type TEXT,  -- organization, user, product, employee, etc.
+        entity_id INTEGER,
+        changes TEXT,  -- JSON: before/after values
+        ip_address TEXT,
+        user_agent TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        {_fk('organization_id', 'organizations', 'SET NULL')},
+        {_fk('user_id', 'users', 'SET NULL')}
+    )
+"""
+
+SCHEMA_DDL = ";\n".join((
+    _ORGANIZATIONS_DDL,
+    _USERS_DDL,
+    _PERMISSION_DEFINITIONS_DDL,
+    _ROLE_TEMPLATES_DDL,
+    _USER_SESSIONS_DDL,
+    _ORGANIZATION_INVITATIONS_DDL,
+    _AUDIT_LOG_DDL,
+)) + ";"
+
+def load_schema(cursor):
+    """Map every table to its set of column names in a single query.
+
+    Membership tests replace per-table PRAGMA table_info round trips:
+    ``table in schema`` and ``column in schema[table]``.
+    """
+    cursor.execute("""
+        SELECT m.name AS t, p.name AS c
+        FROM sqlite_master m, pragma_table_info(m.name) p
+        WHERE m.type = 'table'
+    """)
+    schema = defaultdict(set)
+    for table, column in cursor.fetchall():
+        schema[table].add(column)
+    return schema
+
+def insert_or_ignore_rows(cursor, table, columns, rows):
+    """Insert static seed rows with one multi-row INSERT OR IGNORE statement"""
+    row_placeholders = "(" + ",".join("?" * len(columns)) + ")"
+    cursor.execute(
+        f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES "
+        + ",".join([row_placeholders] * len(rows)),
+        [value for row in rows for value in row]
+    )
 
 def migrate():
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'inventory.db')
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(_DB_PATH)
+    # Manual transaction control: no implicit commits between DDL statements
+    conn.isolation_level = None
     cursor = conn.cursor()
+    original_journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
+
+    # Progress lines are collected and written in one go at the end
+    lines = []
+    log = lines.append
 
-    print("\n" + "="*60)
-    print("🏢 MULTI-TENANT MIGRATION")
-    print("="*60)
+    log("\n" + "="*60)
+    log("🏢 MULTI-TENANT MIGRATION")
+    log("="*60)
 
     try:
+        # executescript() commits any open transaction before it runs, so
+        # the script itself opens the migration transaction
+        cursor.executescript("BEGIN IMMEDIATE;\n" + SCHEMA_DDL)
+        schema = load_schema(cursor)
+        # CREATE INDEX statements collected while creating tables and run
+        # once every row is in place (bulk-load, then index)
+        deferred_indexes = []
+
         # ==========================================
         # STEP 1: Create Organizations Table
         # ==========================================
-        print("\n1️⃣  Creating organizations table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS organizations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_name TEXT NOT NULL UNIQUE,
-                slug TEXT NOT NULL UNIQUE,
-                owner_name TEXT NOT NULL,
-                owner_email TEXT NOT NULL,
-                phone TEXT,
-                address TEXT,
-                city TEXT,
-                state TEXT,
-                zip_code TEXT,
-
-                -- Branding
-                logo_url TEXT,
-                primary_color TEXT DEFAULT '#2563eb',
-
-                -- Subscription & Billing
-                plan_type TEXT DEFAULT 'basic',
-                subscription_status TEXT DEFAULT 'active',
-                monthly_price DECIMAL(10,2) DEFAULT 99.00,
-                billing_email TEXT,
-
-                -- Limits
-                max_employees INTEGER DEFAULT 50,
-                max_products INTEGER DEFAULT 1000,
-                max_storage_mb INTEGER DEFAULT 5000,
-
-                -- Features
-                features TEXT,  -- JSON: ["barcode_scanning", "payroll", "invoicing"]
-
-                -- Status
-                active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        print("   ✓ Organizations table created")
-
-        # Create indexes
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_organizations_slug
-            ON organizations(slug)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_organizations_active
-            ON organizations(active)
-        """)
+        log("\n1️⃣  Creating organizations table...")
+        log("   ✓ Organizations table created")
+
+        # slug is UNIQUE: its autoindex already serves slug lookups
+        cursor.execute("DROP INDEX IF EXISTS idx_organizations_slug")
+        # Indexes are created once all seed data is loaded
+        deferred_indexes += [
+            "CREATE INDEX IF NOT EXISTS idx_organizations_active ON organizations(active)",
+        ]
 
         # ==========================================
         # STEP 2: Create Users Table (Three-Tier Roles)
         # ==========================================
-        print("\n2️⃣  Creating users table with three-tier roles...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_id INTEGER,  -- NULL for super_admin, set for org users
-
-                -- Authentication
-                email TEXT NOT NULL UNIQUE,
-                password_hash TEXT NOT NULL,
-
-                -- Profile
-                first_name TEXT NOT NULL,
-                last_name TEXT NOT NULL,
-                phone TEXT,
-                avatar_url TEXT,
-
-                -- Three-Tier Role System
-                role TEXT NOT NULL,  -- super_admin, organization_admin, employee
-
-                -- Granular Permissions (JSON array)
-                permissions TEXT,  -- ["inventory.view", "payroll.process", "sales.create"]
-
-                -- Organization Switching (Super Admin Only)
-                can_switch_organizations BOOLEAN DEFAULT 0,  -- Only TRUE for super_admin
-                current_organization_id INTEGER,  -- For super admin: which org they're viewing
-
-                -- Status
-                active BOOLEAN DEFAULT 1,
-                last_login TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE CASCADE,
-                FOREIGN KEY (current_organization_id) REFERENCES organizations(id) ON DELETE SET NULL,
-
-                -- CRITICAL CONSTRAINT: Regular users MUST have organization_id
-                CHECK (
-                    (role = 'super_admin' AND organization_id IS NULL) OR
-                    (role != 'super_admin' AND organization_id IS NOT NULL)
-                )
-            )
-        """)
-        print("   ✓ Users table created with role constraints")
-
-        # Create indexes
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_email
-            ON users(email)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_organization
-            ON users(organization_id)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_role
-            ON users(role)
-        """)
+        log("\n2️⃣  Creating users table with three-tier roles...")
+        log("   ✓ Users table created with role constraints")
+
+        # email is UNIQUE, so a separate email index is redundant
+        cursor.execute("DROP INDEX IF EXISTS idx_users_email")
+        # Indexes are created once all seed data is loaded
+        deferred_indexes += [
+            "CREATE INDEX IF NOT EXISTS idx_users_organization ON users(organization_id)",
+            "CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)",
+        ]
 
         # ==========================================
         # STEP 3: Create Permission Definitions
         # ==========================================
-        print("\n3️⃣  Creating permission definitions...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS permission_definitions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                permission_key TEXT NOT NULL UNIQUE,
-                category TEXT NOT NULL,  -- inventory, employees, payroll, sales, settings
-                description TEXT NOT NULL,
-                required_role TEXT,  -- Minimum role required (super_admin, organization_admin, employee)
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        log("\n3️⃣  Creating permission definitions...")
 
         # Define all available permissions
         permissions = [
@@ -232,175 +401,78 @@ def migrate():
             ('users.delete', 'users', 'Delete users', 'organization_admin'),
         ]
 
-        cursor.executemany("""
-            INSERT OR IGNORE INTO permission_definitions
-            (permission_key, category, description, required_role)
-            VALUES (?, ?, ?, ?)
-        """, permissions)
-        print(f"   ✓ {len(permissions)} permissions defined")
+        insert_or_ignore_rows(
+            cursor, 'permission_definitions',
+            ('permission_key', 'category', 'description', 'required_role'),
+            permissions
+        )
+        log(f"   ✓ {len(permissions)} permissions defined")
 
         # ==========================================
         # STEP 4: Create Role Templates
         # ==========================================
-        print("\n4️⃣  Creating role templates...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS role_templates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                role_name TEXT NOT NULL UNIQUE,
-                display_name TEXT NOT NULL,
-                description TEXT,
-                default_permissions TEXT NOT NULL,  -- JSON array of permission keys
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        role_templates = [
-            (
-                'super_admin',
-                'Super Administrator',
-                'Full access to all organizations and all features',
-                '["*"]'  # Wildcard = all permissions
-            ),
-            (
-                'organization_admin',
-                'Organization Administrator',
-                'Full access to all features within their organization',
-                '''[
-                    "inventory.view", "inventory.create", "inventory.edit", "inventory.delete", "inventory.count",
-                    "employees.view", "employees.create", "employees.edit", "employees.delete",
-                    "payroll.view", "payroll.process", "payroll.approve",
-                    "timeclock.view_all", "timeclock.edit_all",
-                    "sales.view", "sales.create", "sales.edit", "sales.delete",
-                    "products.view", "products.create", "products.edit", "products.delete",
-                    "invoices.view", "invoices.create", "invoices.edit", "invoices.delete",
-                    "reports.view", "reports.export",
-                    "settings.view", "settings.edit", "settings.billing",
-                    "users.view", "users.create", "users.edit", "users.delete"
-                ]'''
-            ),
-            (
-                'employee',
-                'Employee',
-                'Limited access to view inventory, clock in/out, and view own information',
-                '''[
-                    "inventory.view", "inventory.count",
-                    "employees.view_own", "employees.edit_own",
-                    "payroll.view_own",
-                    "timeclock.clockin", "timeclock.view_own",
-                    "sales.view", "sales.create",
-                    "products.view",
-                    "invoices.view"
-                ]'''
-            )
-        ]
+        log("\n4️⃣  Creating role templates...")
 
-        cursor.executemany("""
-            INSERT OR IGNORE INTO role_templates
-            (role_name, display_name, description, default_permissions)
-            VALUES (?, ?, ?, ?)
-        """, role_templates)
-        print("   ✓ Role templates created (super_admin, organization_admin, employee)")
+        insert_or_ignore_rows(
+            cursor, 'role_templates',
+            ('role_name', 'display_name', 'description', 'default_permissions'),
+            _ROLE_TEMPLATES
+        )
+        log("   ✓ Role templates created (super_admin, organization_admin, employee)")
 
         # ==========================================
         # STEP 5: Create User Sessions Table
         # ==========================================
-        print("\n5️⃣  Creating user sessions table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                session_token TEXT NOT NULL UNIQUE,
-                organization_id INTEGER,  -- For super admin: which org they're currently viewing
-                ip_address TEXT,
-                user_agent TEXT,
-                expires_at TIMESTAMP NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE SET NULL
-            )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_sessions_token
-            ON user_sessions(session_token)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_sessions_user
-            ON user_sessions(user_id)
-        """)
-        print("   ✓ User sessions table created")
+        log("\n5️⃣  Creating user sessions table...")
+
+        # session_token is UNIQUE, so its automatic index already serves
+        # token lookups and the planner always prefers it (a covering index
+        # on the token would never be chosen). A second token index only
+        # costs writes; drop it where older runs created it.
+        cursor.execute("DROP INDEX IF EXISTS idx_sessions_token")
+        # A user's live sessions: user_id plus an expires_at range
+        cursor.execute("DROP INDEX IF EXISTS idx_sessions_user")
+        deferred_indexes += [
+            "CREATE INDEX IF NOT EXISTS idx_sessions_user_expires ON user_sessions(user_id, expires_at)",
+        ]
+        log("   ✓ User sessions table created")
 
         # ==========================================
         # STEP 6: Create Organization Invitations
         # ==========================================
-        print("\n6️⃣  Creating organization invitations table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS organization_invitations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_id INTEGER NOT NULL,
-                email TEXT NOT NULL,
-                role TEXT NOT NULL,  -- organization_admin or employee
-                permissions TEXT,  -- Custom permissions (optional)
-                invited_by INTEGER NOT NULL,  -- user_id who sent invitation
-                invitation_token TEXT NOT NULL UNIQUE,
-                status TEXT DEFAULT 'pending',  -- pending, accepted, expired, cancelled
-                expires_at TIMESTAMP NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                accepted_at TIMESTAMP,
-                FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE CASCADE,
-                FOREIGN KEY (invited_by) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_invitations_token
-            ON organization_invitations(invitation_token)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_invitations_email
-            ON organization_invitations(email)
-        """)
-        print("   ✓ Organization invitations table created")
+        log("\n6️⃣  Creating organization invitations table...")
+
+        # invitation_token is UNIQUE; pending-invite checks match email,
+        # organization_id and status
+        cursor.execute("DROP INDEX IF EXISTS idx_invitations_token")
+        cursor.execute("DROP INDEX IF EXISTS idx_invitations_email")
+        deferred_indexes += [
+            "CREATE INDEX IF NOT EXISTS idx_invitations_email_org_status "
+            "ON organization_invitations(email, organization_id, status)",
+        ]
+        log("   ✓ Organization invitations table created")
 
         # ==========================================
         # STEP 7: Create Audit Log
         # ==========================================
-        print("\n7️⃣  Creating audit log table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS audit_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_id INTEGER,
-                user_id INTEGER,
-                action TEXT NOT NULL,  -- admin_entered_dashboard, created_product, deleted_employee, etc.
-                entity_type TEXT,  -- organization, user, product, employee, etc.
-                entity_id INTEGER,
-                changes TEXT,  -- JSON: before/after values
-                ip_address TEXT,
-                user_agent TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE SET NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
-            )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_audit_organization
-            ON audit_log(organization_id)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_audit_user
-            ON audit_log(user_id)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_audit_action
-            ON audit_log(action)
-        """)
-        print("   ✓ Audit log table created")
+        log("\n7️⃣  Creating audit log table...")
+
+        # Recent activity per org is filtered by organization_id and sorted
+        # by created_at DESC; the composite index serves both without a sort
+        # and supersedes the organization_id-only index
+        cursor.execute("DROP INDEX IF EXISTS idx_audit_organization")
+        deferred_indexes += [
+            "CREATE INDEX IF NOT EXISTS idx_audit_org_time "
+            "ON audit_log(organization_id, created_at DESC, action)",
+            "CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_log(user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_log(action)",
+        ]
+        log("   ✓ Audit log table created")
 
         # ==========================================
         # STEP 8: Add organization_id to All Existing Tables
         # ==========================================
-        print("\n8️⃣  Adding organization_id to existing tables...")
+        log("\n8️⃣  Adding organization_id to existing tables...")
 
         # First, create a default organization for existing data
         cursor.execute("""
@@ -411,7 +483,7 @@ def migrate():
              '["barcode_scanning", "payroll", "invoicing", "multi_location"]')
         """)
         default_org_id = 1
-        print(f"   ✓ Default organization created (ID: {default_org_id})")
+        log(f"   ✓ Default organization created (ID: {default_org_id})")
 
         # Tables that need organization_id
         tables_to_modify = [
@@ -419,29 +491,42 @@ def migrate():
             'categories', 'sales', 'counts', 'count_items'
         ]
 
+        # Decide everything from the schema snapshot, then run the statements
+        # back to back. executescript() would COMMIT the open transaction
+        # first, so the batch goes through execute() inside it instead.
+        # ADD COLUMN with a constant DEFAULT only rewrites the schema entry in
+        # sqlite_master; existing rows are not touched and read the default,
+        # so this stays O(1) per table. It is allowed with REFERENCES and a
+        # non-NULL default because foreign_keys is OFF for the migration. A
+        # CREATE TABLE ... AS SELECT rebuild would be O(rows) and would drop
+        # the primary keys, constraints and indexes of the original table.
+        statements = []
+        added = []
         for table in tables_to_modify:
-            if table_exists(cursor, table):
-                if not column_exists(cursor, table, 'organization_id'):
-                    print(f"   Adding organization_id to {table}...")
-                    cursor.execute(f"""
-                        ALTER TABLE {table}
-                        ADD COLUMN organization_id INTEGER NOT NULL DEFAULT {default_org_id}
-                        REFERENCES organizations(id) ON DELETE CASCADE
-                    """)
-
-                    # Create index for fast filtering
-                    cursor.execute(f"""
-                        CREATE INDEX IF NOT EXISTS idx_{table}_organization
-                        ON {table}(organization_id)
-                    """)
-                    print(f"   ✓ {table} now has organization_id")
-                else:
-                    print(f"   ✓ {table} already has organization_id")
+            if table not in schema:
+                continue
+            if 'organization_id' in schema[table]:
+                log(f"   ✓ {table} already has organization_id")
+                continue
+            statements.append(
+                f"ALTER TABLE {table} ADD COLUMN organization_id INTEGER NOT NULL "
+                f"DEFAULT {default_org_id} REFERENCES organizations(id) ON DELETE CASCADE"
+            )
+            # Index for fast filtering, built after the column is populated
+            deferred_indexes.append(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_organization ON {table}(organization_id)"
+            )
+            added.append(table)
+
+        for statement in statements:
+            cursor.execute(statement)
+        for table in added:
+            log(f"   ✓ {table} now has organization_id")
 
         # ==========================================
         # STEP 9: Create Super Admin User
         # ==========================================
-        print("\n9️⃣  Creating super admin user...")
+        log("\n9️⃣  Creating super admin user...")
 
         # Check if super admin already exists
         cursor.execute("SELECT id FROM users WHERE role = 'super_admin' LIMIT 1")
@@ -461,61 +546,75 @@ def migrate():
                 (NULL, ?, ?, ?, ?, ?, 1, ?, 1)
             """, (admin_email, password_hash, 'Super', 'Admin', 'super_admin', '["*"]'))
 
-            print(f"   ✓ Super admin created")
-            print(f"   📧 Email: {admin_email}")
-            print(f"   🔑 Password: {admin_password}")
-            print(f"   ⚠️  CHANGE THIS PASSWORD IMMEDIATELY!")
+            log(f"   ✓ Super admin created")
+            log(f"   📧 Email: {admin_email}")
+            log(f"   🔑 Password: {admin_password}")
+            log(f"   ⚠️  CHANGE THIS PASSWORD IMMEDIATELY!")
         else:
-            print("   ✓ Super admin already exists")
+            log("   ✓ Super admin already exists")
 
         # ==========================================
-        # STEP 10: Commit Changes
+        # STEP 10: Create Indexes and Commit Changes
         # ==========================================
-        conn.commit()
-
-        print("\n" + "="*60)
-        print("✅ MULTI-TENANT MIGRATION COMPLETED SUCCESSFULLY!")
-        print("="*60)
-
-        print("\n📊 Summary:")
-        cursor.execute("SELECT COUNT(*) FROM organizations")
-        org_count = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM users")
-        user_count = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM permission_definitions")
-        perm_count = cursor.fetchone()[0]
-
-        print(f"   Organizations: {org_count}")
-        print(f"   Users: {user_count}")
-        print(f"   Permissions: {perm_count}")
-
-        print("\n🎯 Three-Tier Access Control System:")
-        print("   1️⃣  Super Admin - Access all organizations, switch between clients")
-        print("   2️⃣  Organization Admin - Full access within ONE organization")
-        print("   3️⃣  Employee - Limited access to own data and basic features")
-
-        print("\n🔐 Super Admin Login:")
-        print("   Email: admin@wontech.com")
-        print("   Password: admin123")
-        print("   ⚠️  CHANGE PASSWORD IMMEDIATELY!")
-
-        print("\n📝 Next Steps:")
-        print("   1. Restart Flask application")
-        print("   2. Login as super admin")
-        print("   3. Change super admin password")
-        print("   4. Create your first client organization")
-        print("   5. Invite organization admin users")
-        print("   6. Configure subdomain routing (*.wontech.com)")
-
-        print("\n" + "="*60)
+        log("\n🔟 Creating indexes...")
+        for statement in deferred_indexes:
+            cursor.execute(statement)
+        log(f"   ✓ {len(deferred_indexes)} indexes created")
+
+        cursor.execute("COMMIT")
+        cursor.execute("PRAGMA foreign_keys=ON")
+
+        log("\n" + "="*60)
+        log("✅ MULTI-TENANT MIGRATION COMPLETED SUCCESSFULLY!")
+        log("="*60)
+
+        log("\n📊 Summary:")
+        org_count, user_count, perm_count = cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM organizations),
+                   (SELECT COUNT(*) FROM users),
+                   (SELECT COUNT(*) FROM permission_definitions)
+        """).fetchone()
+
+        log(f"   Organizations: {org_count}")
+        log(f"   Users: {user_count}")
+        log(f"   Permissions: {perm_count}")
+
+        log("\n🎯 Three-Tier Access Control System:")
+        log("   1️⃣  Super Admin - Access all organizations, switch between clients")
+        log("   2️⃣  Organization Admin - Full access within ONE organization")
+        log("   3️⃣  Employee - Limited access to own data and basic features")
+
+        log("\n🔐 Super Admin Login:")
+        log("   Email: admin@wontech.com")
+        log("   Password: admin123")
+        log("   ⚠️  CHANGE PASSWORD IMMEDIATELY!")
+
+        log("\n📝 Next Steps:")
+        log("   1. Restart Flask application")
+        log("   2. Login as super admin")
+        log("   3. Change super admin password")
+        log("   4. Create your first client organization")
+        log("   5. Invite organization admin users")
+        log("   6. Configure subdomain routing (*.wontech.com)")
+
+        log("\n" + "="*60)
 
     except sqlite3.Error as e:
-        print(f"\n❌ Migration failed: {e}")
-        conn.rollback()
+        log(f"\n❌ Migration failed: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         raise
 
     finally:
+        # Leaving WAL checkpoints the log back into inventory.db, so plain
+        # file copies of the database see every commit
+        try:
+            cursor.execute(f"PRAGMA journal_mode={original_journal_mode}")
+        except sqlite3.Error as e:
+            log(f"\n⚠️  Could not restore journal_mode={original_journal_mode}: {e}")
         conn.close()
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
 if __name__ == '__main__':
     migrate()
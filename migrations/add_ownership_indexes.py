@@ -0,0 +1,88 @@
+"""
+Add indexes for the own_data_only ownership checks
+
+- paychecks(employee_id), time_entries(employee_id): the JOIN ownership
+  check, created only in databases that have those tables
+
+employees(user_id) is not repeated here: idx_employees_user_id is part of the
+employees schema (db_manager, create_employees_table).
+"""
+
+import sqlite3
+import os
+import re
+
+# Organization database filenames: org_<id>.db
+_ORG_RE = re.compile(r'^org_(\d+)\.db$')
+
+# Per-connection settings for this re-runnable migration (no fsync waits)
+MIGRATION_PRAGMAS = (
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# table -> (index name, columns)
+OWNERSHIP_INDEXES = {
+    'paychecks': ('idx_paychecks_employee_id', 'employee_id'),
+    'time_entries': ('idx_time_entries_employee_id', 'employee_id'),
+}
+
+def add_ownership_indexes(db_path):
+    """Create the ownership-check indexes in one organization database"""
+    # Manual transaction control: every index commits as one unit
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
+
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = {row[0] for row in cursor.fetchall()}
+
+        for table, (index_name, columns) in OWNERSHIP_INDEXES.items():
+            if table not in tables:
+                continue
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({columns})")
+            cursor.execute(f"ANALYZE {table}")
+            print(f"  ✓ {index_name} on {table}({columns})")
+
+        cursor.execute("COMMIT")
+        return True
+
+    except Exception as e:
+        print(f"  ✗ Error adding ownership indexes to {db_path}: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return False
+    finally:
+        conn.close()
+
+def run_migration():
+    """Add the ownership-check indexes to every organization database"""
+    databases_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'databases')
+
+    if not os.path.exists(databases_dir):
+        print("⚠️  No databases directory found")
+        return True
+
+    with os.scandir(databases_dir) as entries:
+        db_paths = sorted(
+            entry.path for entry in entries
+            if entry.is_file(follow_symlinks=False) and _ORG_RE.match(entry.name)
+        )
+
+    success_count = 0
+    for db_path in db_paths:
+        print(f"Processing {os.path.basename(db_path)}...")
+        if add_ownership_indexes(db_path):
+            success_count += 1
+
+    print(f"Migration complete: {success_count}/{len(db_paths)} databases updated")
+    return success_count == len(db_paths)
+
+if __name__ == '__main__':
+    print(f"\n{'='*60}")
+    print("Adding Ownership Check Indexes")
+    print(f"{'='*60}\n")
+    run_migration()
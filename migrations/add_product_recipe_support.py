@@ -9,10 +9,8 @@ import sqlite3
 import sys
 import os
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from app import get_db_connection, INVENTORY_DB
+# Resolved once; connect directly instead of importing the Flask app
+_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'inventory.db')
 
 
 def run_migration():
@@ -22,12 +20,12 @@ def run_migration():
     print("=" * 60)
 
     try:
-        conn = get_db_connection(INVENTORY_DB)
+        conn = sqlite3.connect(_DB_PATH)
         cursor = conn.cursor()
 
         # Check if column already exists
-        cursor.execute("PRAGMA table_info(recipes)")
-        columns = [col[1] for col in cursor.fetchall()]
+        cursor.execute("SELECT name FROM pragma_table_info('recipes')")
+        columns = {row[0] for row in cursor.fetchall()}
 
         if 'source_type' in columns:
             print("✓ Column 'source_type' already exists in recipes table")
@@ -82,7 +80,7 @@ def rollback_migration():
     print("=" * 60)
 
     try:
-        conn = get_db_connection(INVENTORY_DB)
+        conn = sqlite3.connect(_DB_PATH)
         cursor = conn.cursor()
 
         # SQLite doesn't support DROP COLUMN directly, need to recreate table
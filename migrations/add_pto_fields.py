@@ -4,53 +4,67 @@ Add PTO (Paid Time Off) tracking fields to employees table
 
 import sqlite3
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Applied to the migration connection before any DDL. synchronous=OFF skips
+# the fsyncs of a re-runnable one-shot migration; the journal itself stays on
+# so a failed run still rolls back cleanly. Both settings are per-connection.
+MIGRATION_PRAGMAS = (
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# (column, definition) added to employees when missing
+PTO_COLS = [
+    ("pto_hours_available", "REAL DEFAULT 80.0"),
+    ("pto_hours_used", "REAL DEFAULT 0.0"),
+    ("pto_accrual_rate", "REAL DEFAULT 0.0385"),
+    ("pto_last_accrual_date", "DATE"),
+]
+
+# ALTER TABLE rejects a non-constant DEFAULT such as CURRENT_DATE, so existing
+# rows get the migration date in the same transaction that adds the column.
+# New databases declare DEFAULT CURRENT_DATE in db_manager instead.
+PTO_BACKFILL = {
+    "pto_last_accrual_date": "UPDATE employees SET pto_last_accrual_date = CURRENT_DATE",
+}
 
 def run_migration(db_path):
     """Add PTO fields to employees table"""
-    conn = sqlite3.connect(db_path)
+    # Manual transaction control: every statement commits as one unit
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
 
     try:
-        # Check if columns already exist
-        cursor.execute("PRAGMA table_info(employees)")
-        columns = [column[1] for column in cursor.fetchall()]
-
-        # Add PTO fields if they don't exist
-        if 'pto_hours_available' not in columns:
-            cursor.execute("""
-                ALTER TABLE employees
-                ADD COLUMN pto_hours_available REAL DEFAULT 80.0
-            """)
-            print(f"  ✓ Added pto_hours_available column to {db_path}")
-
-        if 'pto_hours_used' not in columns:
-            cursor.execute("""
-                ALTER TABLE employees
-                ADD COLUMN pto_hours_used REAL DEFAULT 0.0
-            """)
-            print(f"  ✓ Added pto_hours_used column to {db_path}")
-
-        if 'pto_accrual_rate' not in columns:
-            cursor.execute("""
-                ALTER TABLE employees
-                ADD COLUMN pto_accrual_rate REAL DEFAULT 0.0385
-            """)
-            print(f"  ✓ Added pto_accrual_rate column to {db_path}")
-            print(f"    (Default rate: 0.0385 hours/day = ~80 hours/year)")
-
-        if 'pto_last_accrual_date' not in columns:
-            cursor.execute("""
-                ALTER TABLE employees
-                ADD COLUMN pto_last_accrual_date DATE
-            """)
-            print(f"  ✓ Added pto_last_accrual_date column to {db_path}")
-
-        conn.commit()
+        # Check which columns already exist
+        cursor.execute("SELECT name FROM pragma_table_info('employees')")
+        columns = {row[0] for row in cursor.fetchall()}
+        missing = [(name, column_def) for name, column_def in PTO_COLS if name not in columns]
+
+        # Already migrated: done after one read, no write lock taken
+        if not missing:
+            return True
+
+        # Add the missing PTO fields in one script and one transaction
+        alters = ";\n".join(
+            [f"ALTER TABLE employees ADD COLUMN {name} {column_def}"
+             for name, column_def in missing]
+            + [PTO_BACKFILL[name] for name, _ in missing if name in PTO_BACKFILL]
+        )
+        cursor.executescript(f"BEGIN IMMEDIATE;\n{alters};\nCOMMIT;")
+
+        for name, _ in missing:
+            print(f"  ✓ Added {name} column to {db_path}")
+            if name == 'pto_accrual_rate':
+                print(f"    (Default rate: 0.0385 hours/day = ~80 hours/year)")
         return True
 
     except Exception as e:
         print(f"  ✗ Error adding PTO fields to {db_path}: {e}")
-        conn.rollback()
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         return False
     finally:
         conn.close()
@@ -64,7 +78,11 @@ if __name__ == '__main__':
         exit(1)
 
     # Find all org databases
-    db_files = [f for f in os.listdir(databases_dir) if f.startswith('org_') and f.endswith('.db')]
+    db_files = [
+        entry.name for entry in os.scandir(databases_dir)
+        if entry.is_file(follow_symlinks=False)
+        and entry.name.startswith('org_') and entry.name.endswith('.db')
+    ]
 
     if not db_files:
         print("No organization databases found!")
@@ -74,13 +92,12 @@ if __name__ == '__main__':
     print("Adding PTO Fields to Employees Table")
     print(f"{'='*60}\n")
 
-    success_count = 0
-    for db_file in sorted(db_files):
-        db_path = os.path.join(databases_dir, db_file)
-        print(f"Processing {db_file}...")
-        if run_migration(db_path):
-            success_count += 1
-        print()
+    # Each org database is an independent file, so they migrate in parallel
+    db_paths = [os.path.join(databases_dir, f) for f in sorted(db_files)]
+    with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as executor:
+        results = list(executor.map(run_migration, db_paths))
+    success_count = sum(results)
+    print()
 
     print(f"{'='*60}")
     print(f"Migration complete: {success_count}/{len(db_files)} databases updated")
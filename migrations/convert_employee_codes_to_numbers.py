@@ -20,7 +20,8 @@ def convert_employee_codes():
         print(f"❌ Database not found: {db_path}")
         return
 
-    conn = sqlite3.connect(db_path)
+    # Manual transaction control for the batched UPDATE below
+    conn = sqlite3.connect(db_path, isolation_level=None)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
@@ -31,41 +32,51 @@ def convert_employee_codes():
     print(f"Found {len(employees)} employees")
     print("\nConverting employee codes to 4-digit numbers...\n")
 
+    # First pass: keep the first 4 digits of existing codes where that is
+    # unique; everyone else gets a random code
     used_codes = set()
-    updates = []
-
+    assigned = []
     for employee in employees:
-        old_code = employee['employee_code']
-
-        # Try to extract numbers from existing code
-        numbers_in_code = ''.join(filter(str.isdigit, old_code))
-
-        if numbers_in_code and len(numbers_in_code) >= 4:
-            # Use first 4 digits if available
-            new_code = numbers_in_code[:4]
-        else:
-            # Generate random 4-digit code
-            while True:
-                new_code = str(random.randint(1000, 9999))
-                if new_code not in used_codes:
-                    break
-
-        # Ensure uniqueness
-        while new_code in used_codes:
-            new_code = str(random.randint(1000, 9999))
-
-        used_codes.add(new_code)
+        numbers_in_code = ''.join(filter(str.isdigit, employee['employee_code'] or ''))
+        new_code = numbers_in_code[:4] if len(numbers_in_code) >= 4 else None
+        if new_code in used_codes:
+            new_code = None
+        if new_code:
+            used_codes.add(new_code)
+        assigned.append(new_code)
+
+    # Draw every random code at once from the codes still free: unique by
+    # construction, no retry loop
+    need = assigned.count(None)
+    pool = iter(random.sample(
+        [code for code in map(str, range(1000, 10000)) if code not in used_codes], need
+    ))
+
+    updates = []
+    lines = []
+    for employee, new_code in zip(employees, assigned):
+        if new_code is None:
+            new_code = next(pool)
         updates.append((new_code, employee['id']))
 
-        print(f"✓ {employee['first_name']} {employee['last_name']}: {old_code} → {new_code}")
+        lines.append(f"✓ {employee['first_name']} {employee['last_name']}: {employee['employee_code']} → {new_code}")
+
+    # One write for the whole listing instead of a print per employee
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
     # Apply updates
     print("\nApplying updates...")
-    for new_code, emp_id in updates:
-        cursor.execute("UPDATE employees SET employee_code = ? WHERE id = ?", (new_code, emp_id))
-
-    conn.commit()
-    conn.close()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.executemany("UPDATE employees SET employee_code = ? WHERE id = ?", updates)
+        cursor.execute("COMMIT")
+    except sqlite3.Error:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
 
     print(f"\n✅ Successfully converted {len(updates)} employee codes to numbers!")
 
@@ -11,6 +11,12 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db_manager import get_org_db_path
 
+# Migration connection settings: skip fsyncs, keep temp b-trees in memory
+MIGRATION_PRAGMAS = (
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+)
+
 def create_attendance_table():
     """Create attendance table in org_1 database"""
 
@@ -19,6 +25,8 @@ def create_attendance_table():
 
     conn = sqlite3.connect(org_db_path)
     cursor = conn.cursor()
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
 
     # Create attendance table
     cursor.execute("""
@@ -42,22 +50,31 @@ def create_attendance_table():
         )
     """)
 
-    # Create indexes for performance
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_attendance_employee
-        ON attendance (employee_id)
-    """)
+    # Create indexes for performance, in one script:
+    # - latest records per employee (employee_id, clock_in DESC), superseding
+    #   the employee_id-only index
+    # - open shifts only (clock_out IS NULL): a small partial index for the
+    #   "currently clocked in" lookups
+    cursor.executescript("""
+        DROP INDEX IF EXISTS idx_attendance_employee;
+
+        CREATE INDEX IF NOT EXISTS idx_attendance_emp_clockin
+        ON attendance (employee_id, clock_in DESC);
+
+        CREATE INDEX IF NOT EXISTS idx_attendance_open
+        ON attendance (organization_id, employee_id, clock_in)
+        WHERE clock_out IS NULL;
 
-    cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_attendance_date
-        ON attendance (clock_in)
-    """)
+        ON attendance (clock_in);
 
-    cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_attendance_status
-        ON attendance (status)
+        ON attendance (status);
     """)
 
+    # Gather index statistics so the planner can choose between them
+    cursor.execute("ANALYZE attendance")
+
     conn.commit()
 
     print("✅ Attendance table created successfully!")
@@ -11,15 +11,174 @@ Even if code has a bug, impossible to access another org's data.
 
 import sqlite3
 import os
-import hashlib
-import secrets
+import sys
 from datetime import datetime, timedelta
 
-def hash_password(password):
-    """Hash password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${pwd_hash}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.auth import hash_password
+
+# Applied right after connect, before BEGIN (journal_mode cannot change inside
+# a transaction). WAL persists in master.db, so the app's readers no longer
+# block behind writers; the rest last only for this connection.
+MIGRATION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+# permission_definitions and role_templates are small tables read by their
+# text key, so they are stored WITHOUT ROWID (one btree instead of table +
+# UNIQUE index). STRICT type checking is added where SQLite supports it (3.37+).
+LOOKUP_TABLE_OPTIONS = ("WITHOUT ROWID, STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0)
+                        else "WITHOUT ROWID")
+
+# Permission definitions and role templates, as INSERT OR IGNORE statements.
+# Edited directly (like the other files in data/sql) and appended to
+# MASTER_DDL, so tables and seed rows go to SQLite in one script.
+SEED_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'data', 'sql', 'master_seed.sql')
+
+# Every master table, handed to SQLite in one executescript call. Indexes are
+# created separately, after the seed rows are in (see migrate()).
+MASTER_DDL = f"""
+    CREATE TABLE IF NOT EXISTS organizations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_name TEXT NOT NULL UNIQUE,
+        slug TEXT NOT NULL UNIQUE,
+        db_filename TEXT NOT NULL UNIQUE,  -- e.g., "org_1.db"
+        owner_name TEXT NOT NULL,
+        owner_email TEXT NOT NULL,
+        phone TEXT,
+        address TEXT,
+        city TEXT,
+        state TEXT,
+        zip_code TEXT,
+
+        -- Branding
+        logo_url TEXT,
+        primary_color TEXT DEFAULT '#2563eb',
+
+        -- Subscription & Billing
+        plan_type TEXT DEFAULT 'basic',
+        subscription_status TEXT DEFAULT 'active',
+        monthly_price REAL DEFAULT 99.00,
+        billing_email TEXT,
+
+        -- Limits
+        max_employees INTEGER DEFAULT 50,
+        max_products INTEGER DEFAULT 1000,
+        max_storage_mb INTEGER DEFAULT 5000,
+
+        -- Features
+        features TEXT,  -- JSON: ["barcode_scanning", "payroll", "invoicing"]
+
+        -- Status
+        active INTEGER DEFAULT 1 CHECK (active IN (0, 1)),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER,  -- NULL for super_admin, set for org users
+
+        -- Authentication
+        email TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+
+        -- Profile
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        phone TEXT,
+        avatar_url TEXT,
+
+        -- Three-Tier Role System
+        role TEXT NOT NULL,  -- super_admin, organization_admin, employee
+
+        -- Granular Permissions (JSON array)
+        permissions TEXT,  -- ["inventory.view", "payroll.process", "sales.create"]
+
+        -- Organization Switching (Super Admin Only)
+        can_switch_organizations INTEGER DEFAULT 0 CHECK (can_switch_organizations IN (0, 1)),
+        current_organization_id INTEGER,
+
+        -- Status
+        active INTEGER DEFAULT 1 CHECK (active IN (0, 1)),
+        last_login TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE CASCADE,
+        FOREIGN KEY (current_organization_id) REFERENCES organizations(id) ON DELETE SET NULL,
+
+        CHECK (
+            (role = 'super_admin' AND organization_id IS NULL) OR
+            (role != 'super_admin' AND organization_id IS NOT NULL)
+        )
+    );
+
+    CREATE TABLE IF NOT EXISTS permission_definitions (
+        permission_key TEXT NOT NULL PRIMARY KEY,
+        category TEXT NOT NULL,
+        description TEXT NOT NULL,
+        required_role TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    ) {LOOKUP_TABLE_OPTIONS};
+
+    CREATE TABLE IF NOT EXISTS role_templates (
+        role_name TEXT NOT NULL PRIMARY KEY,
+        display_name TEXT NOT NULL,
+        description TEXT,
+        default_permissions TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    ) {LOOKUP_TABLE_OPTIONS};
+
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        session_token TEXT NOT NULL UNIQUE,
+        organization_id INTEGER,
+        ip_address TEXT,
+        user_agent TEXT,
+        expires_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE SET NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS organization_invitations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER NOT NULL,
+        email TEXT NOT NULL,
+        role TEXT NOT NULL,
+        permissions TEXT,
+        invited_by INTEGER NOT NULL,
+        invitation_token TEXT NOT NULL UNIQUE,
+        status TEXT DEFAULT 'pending',
+        expires_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        accepted_at TIMESTAMP,
+        FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE CASCADE,
+        FOREIGN KEY (invited_by) REFERENCES users(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS audit_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER,
+        user_id INTEGER,
+        action TEXT NOT NULL,
+        entity_type TEXT,
+        entity_id INTEGER,
+        changes TEXT,
+        ip_address TEXT,
+        user_agent TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE SET NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
+    );
+"""
 
 def migrate():
     # Use script directory (simple and works everywhere)
@@ -36,272 +195,102 @@ def migrate():
     print("🏢 CREATING MASTER DATABASE (Separate DB Architecture)")
     print("="*60)
 
-    conn = sqlite3.connect(master_db_path)
+    with open(SEED_SQL, encoding='utf-8') as f:
+        seed_sql = f.read()
+
+    # Manual transaction control: the whole schema and seed data commit once
+    conn = sqlite3.connect(master_db_path, isolation_level=None)
     cursor = conn.cursor()
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
 
     try:
+        # The transaction is opened inside the script: executescript()
+        # would otherwise commit it before running the DDL
+        cursor.executescript("BEGIN IMMEDIATE;\n" + MASTER_DDL + seed_sql)
+
+        # CREATE INDEX statements gathered per table and run after the seed
+        # rows are inserted, so the inserts skip index maintenance
+        deferred_indexes = []
+
         # ==========================================
         # ORGANIZATIONS TABLE
         # ==========================================
         print("\n1️⃣  Creating organizations table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS organizations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_name TEXT NOT NULL UNIQUE,
-                slug TEXT NOT NULL UNIQUE,
-                db_filename TEXT NOT NULL UNIQUE,  -- e.g., "org_1.db"
-                owner_name TEXT NOT NULL,
-                owner_email TEXT NOT NULL,
-                phone TEXT,
-                address TEXT,
-                city TEXT,
-                state TEXT,
-                zip_code TEXT,
-
-                -- Branding
-                logo_url TEXT,
-                primary_color TEXT DEFAULT '#2563eb',
-
-                -- Subscription & Billing
-                plan_type TEXT DEFAULT 'basic',
-                subscription_status TEXT DEFAULT 'active',
-                monthly_price DECIMAL(10,2) DEFAULT 99.00,
-                billing_email TEXT,
-
-                -- Limits
-                max_employees INTEGER DEFAULT 50,
-                max_products INTEGER DEFAULT 1000,
-                max_storage_mb INTEGER DEFAULT 5000,
-
-                -- Features
-                features TEXT,  -- JSON: ["barcode_scanning", "payroll", "invoicing"]
-
-                -- Status
-                active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
         print("   ✓ Organizations table created")
 
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_organizations_slug ON organizations(slug)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_organizations_active ON organizations(active)")
+        # slug is UNIQUE, so its autoindex covers slug lookups
+        deferred_indexes += [
+            "DROP INDEX IF EXISTS idx_organizations_slug",
+            "CREATE INDEX IF NOT EXISTS idx_organizations_active ON organizations(active)",
+        ]
 
         # ==========================================
         # USERS TABLE
         # ==========================================
         print("\n2️⃣  Creating users table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_id INTEGER,  -- NULL for super_admin, set for org users
-
-                -- Authentication
-                email TEXT NOT NULL UNIQUE,
-                password_hash TEXT NOT NULL,
-
-                -- Profile
-                first_name TEXT NOT NULL,
-                last_name TEXT NOT NULL,
-                phone TEXT,
-                avatar_url TEXT,
-
-                -- Three-Tier Role System
-                role TEXT NOT NULL,  -- super_admin, organization_admin, employee
-
-                -- Granular Permissions (JSON array)
-                permissions TEXT,  -- ["inventory.view", "payroll.process", "sales.create"]
-
-                -- Organization Switching (Super Admin Only)
-                can_switch_organizations BOOLEAN DEFAULT 0,
-                current_organization_id INTEGER,
-
-                -- Status
-                active BOOLEAN DEFAULT 1,
-                last_login TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE CASCADE,
-                FOREIGN KEY (current_organization_id) REFERENCES organizations(id) ON DELETE SET NULL,
-
-                CHECK (
-                    (role = 'super_admin' AND organization_id IS NULL) OR
-                    (role != 'super_admin' AND organization_id IS NOT NULL)
-                )
-            )
-        """)
         print("   ✓ Users table created")
 
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_organization ON users(organization_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)")
+        # email is UNIQUE - its autoindex already serves login lookups
+        deferred_indexes += [
+            "DROP INDEX IF EXISTS idx_users_email",
+            "CREATE INDEX IF NOT EXISTS idx_users_organization ON users(organization_id)",
+            "CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)",
+        ]
 
         # ==========================================
         # PERMISSION DEFINITIONS
         # ==========================================
         print("\n3️⃣  Creating permission definitions...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS permission_definitions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                permission_key TEXT NOT NULL UNIQUE,
-                category TEXT NOT NULL,
-                description TEXT NOT NULL,
-                required_role TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
 
-        permissions = [
-            ('inventory.view', 'inventory', 'View inventory items', 'employee'),
-            ('inventory.create', 'inventory', 'Create new inventory items', 'organization_admin'),
-            ('inventory.edit', 'inventory', 'Edit existing inventory items', 'organization_admin'),
-            ('inventory.delete', 'inventory', 'Delete inventory items', 'organization_admin'),
-            ('inventory.count', 'inventory', 'Perform inventory counts', 'employee'),
-            ('employees.view', 'employees', 'View employee list and profiles', 'organization_admin'),
-            ('employees.create', 'employees', 'Add new employees', 'organization_admin'),
-            ('employees.edit', 'employees', 'Edit employee information', 'organization_admin'),
-            ('employees.delete', 'employees', 'Delete employees', 'organization_admin'),
-            ('employees.view_own', 'employees', 'View own employee profile', 'employee'),
-            ('employees.edit_own', 'employees', 'Edit own employee profile', 'employee'),
-            ('payroll.view', 'payroll', 'View payroll information', 'organization_admin'),
-            ('payroll.process', 'payroll', 'Process payroll runs', 'organization_admin'),
-            ('payroll.approve', 'payroll', 'Approve paychecks', 'organization_admin'),
-            ('payroll.view_own', 'payroll', 'View own paystubs', 'employee'),
-            ('timeclock.clockin', 'timeclock', 'Clock in/out', 'employee'),
-            ('timeclock.view_own', 'timeclock', 'View own time entries', 'employee'),
-            ('timeclock.view_all', 'timeclock', 'View all time entries', 'organization_admin'),
-            ('timeclock.edit_all', 'timeclock', 'Edit any time entries', 'organization_admin'),
-            ('sales.view', 'sales', 'View sales records', 'employee'),
-            ('sales.create', 'sales', 'Record new sales', 'employee'),
-            ('sales.edit', 'sales', 'Edit sales records', 'organization_admin'),
-            ('sales.delete', 'sales', 'Delete sales records', 'organization_admin'),
-            ('products.view', 'products', 'View products and recipes', 'employee'),
-            ('products.create', 'products', 'Create new products', 'organization_admin'),
-            ('products.edit', 'products', 'Edit products and recipes', 'organization_admin'),
-            ('products.delete', 'products', 'Delete products', 'organization_admin'),
-            ('invoices.view', 'invoices', 'View invoices', 'employee'),
-            ('invoices.create', 'invoices', 'Create new invoices', 'organization_admin'),
-            ('invoices.edit', 'invoices', 'Edit invoices', 'organization_admin'),
-            ('invoices.delete', 'invoices', 'Delete invoices', 'organization_admin'),
-            ('reports.view', 'reports', 'View reports and analytics', 'organization_admin'),
-            ('reports.export', 'reports', 'Export report data', 'organization_admin'),
-            ('settings.view', 'settings', 'View organization settings', 'organization_admin'),
-            ('settings.edit', 'settings', 'Edit organization settings', 'organization_admin'),
-            ('settings.billing', 'settings', 'Manage billing and subscription', 'organization_admin'),
-            ('users.view', 'users', 'View user list', 'organization_admin'),
-            ('users.create', 'users', 'Invite new users', 'organization_admin'),
-            ('users.edit', 'users', 'Edit user permissions', 'organization_admin'),
-            ('users.delete', 'users', 'Delete users', 'organization_admin'),
-        ]
-
-        cursor.executemany("""
-            INSERT OR IGNORE INTO permission_definitions
-            (permission_key, category, description, required_role)
-            VALUES (?, ?, ?, ?)
-        """, permissions)
-        print(f"   ✓ {len(permissions)} permissions defined")
+        cursor.execute("SELECT COUNT(*) FROM permission_definitions")
+        print(f"   ✓ {cursor.fetchone()[0]} permissions defined")
 
         # ==========================================
         # ROLE TEMPLATES
         # ==========================================
         print("\n4️⃣  Creating role templates...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS role_templates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                role_name TEXT NOT NULL UNIQUE,
-                display_name TEXT NOT NULL,
-                description TEXT,
-                default_permissions TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        role_templates = [
-            ('super_admin', 'Super Administrator', 'Full access to all organizations', '["*"]'),
-            ('organization_admin', 'Organization Administrator', 'Full access within organization',
-             '["inventory.*", "employees.*", "payroll.*", "timeclock.*", "sales.*", "products.*", "invoices.*", "reports.*", "settings.*", "users.*", "schedules.*"]'),
-            ('employee', 'Employee', 'Limited access to own data',
-             '["inventory.view", "inventory.count", "employees.view_own", "employees.edit_own", "payroll.view_own", "timeclock.clockin", "timeclock.view_own", "sales.view", "sales.create", "products.view", "invoices.view"]')
-        ]
 
-        cursor.executemany("""
-            INSERT OR IGNORE INTO role_templates
-            (role_name, display_name, description, default_permissions)
-            VALUES (?, ?, ?, ?)
-        """, role_templates)
         print("   ✓ Role templates created")
 
         # ==========================================
         # USER SESSIONS
         # ==========================================
         print("\n5️⃣  Creating user sessions table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                session_token TEXT NOT NULL UNIQUE,
-                organization_id INTEGER,
-                ip_address TEXT,
-                user_agent TEXT,
-                expires_at TIMESTAMP NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE SET NULL
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_token ON user_sessions(session_token)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON user_sessions(user_id)")
+        # session_token is UNIQUE; live sessions are found by user + expiry
+        deferred_indexes += [
+            "DROP INDEX IF EXISTS idx_sessions_token",
+            "DROP INDEX IF EXISTS idx_sessions_user",
+            "CREATE INDEX IF NOT EXISTS idx_sessions_user_expires ON user_sessions(user_id, expires_at)",
+        ]
         print("   ✓ User sessions table created")
 
         # ==========================================
         # ORGANIZATION INVITATIONS
         # ==========================================
         print("\n6️⃣  Creating organization invitations table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS organization_invitations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_id INTEGER NOT NULL,
-                email TEXT NOT NULL,
-                role TEXT NOT NULL,
-                permissions TEXT,
-                invited_by INTEGER NOT NULL,
-                invitation_token TEXT NOT NULL UNIQUE,
-                status TEXT DEFAULT 'pending',
-                expires_at TIMESTAMP NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                accepted_at TIMESTAMP,
-                FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE CASCADE,
-                FOREIGN KEY (invited_by) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_invitations_token ON organization_invitations(invitation_token)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_invitations_email ON organization_invitations(email)")
+        # invitation_token is UNIQUE; the pending-invite check filters on
+        # email + organization_id + status, and email leads for email lookups
+        deferred_indexes += [
+            "DROP INDEX IF EXISTS idx_invitations_token",
+            "DROP INDEX IF EXISTS idx_invitations_email",
+            "CREATE INDEX IF NOT EXISTS idx_invitations_email_org_status "
+            "ON organization_invitations(email, organization_id, status)",
+        ]
         print("   ✓ Organization invitations table created")
 
         # ==========================================
         # AUDIT LOG
         # ==========================================
         print("\n7️⃣  Creating audit log table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS audit_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_id INTEGER,
-                user_id INTEGER,
-                action TEXT NOT NULL,
-                entity_type TEXT,
-                entity_id INTEGER,
-                changes TEXT,
-                ip_address TEXT,
-                user_agent TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (organization_id) REFERENCES organizations(id) ON DELETE SET NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_organization ON audit_log(organization_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_log(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_log(action)")
+        # Org activity feeds filter by organization and sort newest first
+        deferred_indexes += [
+            "DROP INDEX IF EXISTS idx_audit_organization",
+            "CREATE INDEX IF NOT EXISTS idx_audit_org_time "
+            "ON audit_log(organization_id, created_at DESC, action)",
+            "CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_log(user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_log(action)",
+        ]
         print("   ✓ Audit log table created")
 
         # ==========================================
@@ -338,7 +327,17 @@ def migrate():
         print(f"   🔑 Password: {admin_password}")
         print(f"   ⚠️  CHANGE THIS PASSWORD IMMEDIATELY!")
 
-        conn.commit()
+        # ==========================================
+        # CREATE INDEXES
+        # ==========================================
+        print("\n🔟 Creating indexes...")
+        for statement in deferred_indexes:
+            cursor.execute(statement)
+        # Planner statistics for the first queries against the new schema
+        cursor.execute("ANALYZE")
+        print(f"   ✓ {sum(s.startswith('CREATE') for s in deferred_indexes)} indexes created")
+
+        cursor.execute("COMMIT")
 
         print("\n" + "="*60)
         print("✅ MASTER DATABASE CREATED SUCCESSFULLY!")
@@ -367,7 +366,8 @@ def migrate():
 
     except sqlite3.Error as e:
         print(f"\n❌ Migration failed: {e}")
-        conn.rollback()
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         raise
     finally:
         conn.close()
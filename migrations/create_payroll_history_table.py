@@ -5,7 +5,69 @@ This prevents wage changes from affecting historical payroll calculations.
 
 import sqlite3
 import os
-from db_manager import get_org_db_path
+import re
+from concurrent.futures import ThreadPoolExecutor
+from db_manager import DATABASES_DIR, get_org_db_path
+
+# Organization database filenames: org_<id>.db
+_ORG_RE = re.compile(r'^org_(\d+)\.db$')
+
+# Set before BEGIN. WAL is stored in the org database file and stays on after
+# the migration; sync level, temp store and cache size are per-connection.
+MIGRATION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+# payroll_history plus its lookup indexes, executed as a single script
+PAYROLL_HISTORY_DDL = """
+    CREATE TABLE IF NOT EXISTS payroll_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER NOT NULL,
+        employee_id INTEGER NOT NULL,
+        pay_period_start DATE NOT NULL,
+        pay_period_end DATE NOT NULL,
+        pay_period_type TEXT NOT NULL DEFAULT 'weekly',
+
+        -- Wage rate at time of processing (locked in)
+        hourly_rate_used REAL DEFAULT 0,
+        salary_used REAL DEFAULT 0,
+
+        -- Hours
+        total_hours REAL DEFAULT 0,
+        regular_hours REAL DEFAULT 0,
+        ot_hours REAL DEFAULT 0,
+
+        -- Calculated pay (locked in)
+        regular_wage REAL DEFAULT 0,
+        ot_wage REAL DEFAULT 0,
+        tips REAL DEFAULT 0,
+        gross_pay REAL DEFAULT 0,
+
+        -- Additional info
+        job_classification TEXT,
+        position TEXT,
+        notes TEXT,
+
+        -- Processing info
+        processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        processed_by INTEGER,
+
+        -- Unique constraint to prevent duplicate processing
+        UNIQUE(organization_id, employee_id, pay_period_start, pay_period_end),
+
+        FOREIGN KEY (employee_id) REFERENCES employees(id),
+        FOREIGN KEY (processed_by) REFERENCES users(id)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_payroll_history_period
+    ON payroll_history(organization_id, pay_period_start, pay_period_end);
+
+    CREATE INDEX IF NOT EXISTS idx_payroll_history_employee
+    ON payroll_history(employee_id, pay_period_start);
+"""
 
 def run_migration(org_id):
     """Run migration for a specific organization database"""
@@ -15,70 +77,21 @@ def run_migration(org_id):
         print(f"Database for org {org_id} does not exist")
         return False
 
-    conn = sqlite3.connect(db_path)
+    # Table and indexes commit together
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
 
     try:
-        # Create payroll_history table to store processed payroll records
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS payroll_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_id INTEGER NOT NULL,
-                employee_id INTEGER NOT NULL,
-                pay_period_start DATE NOT NULL,
-                pay_period_end DATE NOT NULL,
-                pay_period_type TEXT NOT NULL DEFAULT 'weekly',
-
-                -- Wage rate at time of processing (locked in)
-                hourly_rate_used REAL DEFAULT 0,
-                salary_used REAL DEFAULT 0,
-
-                -- Hours
-                total_hours REAL DEFAULT 0,
-                regular_hours REAL DEFAULT 0,
-                ot_hours REAL DEFAULT 0,
-
-                -- Calculated pay (locked in)
-                regular_wage REAL DEFAULT 0,
-                ot_wage REAL DEFAULT 0,
-                tips REAL DEFAULT 0,
-                gross_pay REAL DEFAULT 0,
-
-                -- Additional info
-                job_classification TEXT,
-                position TEXT,
-                notes TEXT,
-
-                -- Processing info
-                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                processed_by INTEGER,
-
-                -- Unique constraint to prevent duplicate processing
-                UNIQUE(organization_id, employee_id, pay_period_start, pay_period_end),
-
-                FOREIGN KEY (employee_id) REFERENCES employees(id),
-                FOREIGN KEY (processed_by) REFERENCES users(id)
-            )
-        """)
-
-        # Create index for faster lookups
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_payroll_history_period
-            ON payroll_history(organization_id, pay_period_start, pay_period_end)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_payroll_history_employee
-            ON payroll_history(employee_id, pay_period_start)
-        """)
-
-        conn.commit()
+        cursor.executescript(f"BEGIN IMMEDIATE;\n{PAYROLL_HISTORY_DDL}\nCOMMIT;")
         print(f"Successfully created payroll_history table for org {org_id}")
         return True
 
     except Exception as e:
         print(f"Error creating payroll_history table for org {org_id}: {str(e)}")
-        conn.rollback()
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         return False
     finally:
         conn.close()
@@ -86,13 +99,16 @@ def run_migration(org_id):
 
 def run_for_all_orgs():
     """Run migration for all organization databases"""
-    # Find all org databases
-    db_dir = os.path.dirname(get_org_db_path(1))
-
-    for filename in os.listdir(db_dir):
-        if filename.startswith('org_') and filename.endswith('.db'):
-            org_id = int(filename.replace('org_', '').replace('.db', ''))
-            run_migration(org_id)
+    # Find all org databases: one directory read, ids parsed from the names
+    with os.scandir(DATABASES_DIR) as entries:
+        org_ids = [
+            int(m.group(1)) for entry in entries
+            if entry.is_file() and (m := _ORG_RE.match(entry.name))
+        ]
+
+    # Each org database is its own file, so the migrations run in parallel
+    with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as executor:
+        list(executor.map(run_migration, org_ids))
 
 
 if __name__ == '__main__':
@@ -5,79 +5,95 @@ Creates the schedules table for employee shift scheduling and management
 
 import sqlite3
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Organization database filenames: org_<id>.db
+_ORG_RE = re.compile(r'^org_(\d+)\.db$')
+
+# Connection setup for this migration: WAL (persistent, matches the app's
+# pooled org connections), NORMAL sync, in-memory temp, 64 MB page cache
+MIGRATION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+# The table and its indexes, run as one script
+SCHEDULES_DDL = """
+    CREATE TABLE IF NOT EXISTS schedules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER NOT NULL,
+        employee_id INTEGER NOT NULL,
+
+        -- Schedule details
+        date DATE NOT NULL,
+        start_time TIME NOT NULL,
+        end_time TIME NOT NULL,
+
+        -- Shift information
+        shift_type TEXT DEFAULT 'regular',
+        position TEXT,
+        notes TEXT,
+
+        -- Break information
+        break_duration INTEGER DEFAULT 30,
+
+        -- Status tracking
+        status TEXT DEFAULT 'scheduled',
+
+        -- Change request tracking
+        change_requested_by INTEGER,
+        change_request_reason TEXT,
+        change_request_status TEXT,
+        change_request_date TIMESTAMP,
+
+        -- Audit fields
+        created_by INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_by INTEGER,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        -- Foreign keys
+        FOREIGN KEY (organization_id) REFERENCES organizations(id),
+        FOREIGN KEY (employee_id) REFERENCES employees(id),
+        FOREIGN KEY (created_by) REFERENCES users(id),
+        FOREIGN KEY (updated_by) REFERENCES users(id),
+        FOREIGN KEY (change_requested_by) REFERENCES employees(id)
+    );
+
+    -- Employee + day conflict checks and per-employee ranges; date-only
+    -- filters always come with organization_id (idx_schedules_org_date)
+    DROP INDEX IF EXISTS idx_schedules_employee;
+    DROP INDEX IF EXISTS idx_schedules_date;
+
+    CREATE INDEX IF NOT EXISTS idx_schedules_employee_date
+    ON schedules(employee_id, date);
+
+    CREATE INDEX IF NOT EXISTS idx_schedules_org_date
+    ON schedules(organization_id, date);
+
+    CREATE INDEX IF NOT EXISTS idx_schedules_status
+    ON schedules(status);
+"""
 
 def create_schedules_table(db_path):
     """Create schedules table in the specified database"""
-    conn = sqlite3.connect(db_path)
+    # One explicit transaction for the table and its indexes
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
-
-    # Create schedules table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS schedules (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            organization_id INTEGER NOT NULL,
-            employee_id INTEGER NOT NULL,
-
-            -- Schedule details
-            date DATE NOT NULL,
-            start_time TIME NOT NULL,
-            end_time TIME NOT NULL,
-
-            -- Shift information
-            shift_type TEXT DEFAULT 'regular',
-            position TEXT,
-            notes TEXT,
-
-            -- Break information
-            break_duration INTEGER DEFAULT 30,
-
-            -- Status tracking
-            status TEXT DEFAULT 'scheduled',
-
-            -- Change request tracking
-            change_requested_by INTEGER,
-            change_request_reason TEXT,
-            change_request_status TEXT,
-            change_request_date TIMESTAMP,
-
-            -- Audit fields
-            created_by INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_by INTEGER,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-            -- Foreign keys
-            FOREIGN KEY (organization_id) REFERENCES organizations(id),
-            FOREIGN KEY (employee_id) REFERENCES employees(id),
-            FOREIGN KEY (created_by) REFERENCES users(id),
-            FOREIGN KEY (updated_by) REFERENCES users(id),
-            FOREIGN KEY (change_requested_by) REFERENCES employees(id)
-        )
-    """)
-
-    # Create indexes for performance
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_schedules_employee
-        ON schedules(employee_id)
-    """)
-
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_schedules_date
-        ON schedules(date)
-    """)
-
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_schedules_org_date
-        ON schedules(organization_id, date)
-    """)
-
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_schedules_status
-        ON schedules(status)
-    """)
-
-    conn.commit()
-    conn.close()
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
+
+    try:
+        cursor.executescript(f"BEGIN IMMEDIATE;\n{SCHEDULES_DDL}\nCOMMIT;")
+    except Exception:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
 
     print(f"✅ Schedules table created successfully in {db_path}")
 
@@ -88,11 +104,15 @@ def run_migration():
 
     # Get all organization databases
     if os.path.exists(databases_dir):
-        for db_file in os.listdir(databases_dir):
-            if db_file.startswith('org_') and db_file.endswith('.db'):
-                db_path = os.path.join(databases_dir, db_file)
-                print(f"\n🔧 Migrating {db_file}...")
-                create_schedules_table(db_path)
+        with os.scandir(databases_dir) as entries:
+            db_paths = sorted(
+                entry.path for entry in entries
+                if entry.is_file() and _ORG_RE.match(entry.name)
+            )
+        print(f"\n🔧 Migrating {len(db_paths)} organization databases...")
+        # One file per org, nothing shared: run them side by side
+        with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as executor:
+            list(executor.map(create_schedules_table, db_paths))
     else:
         print("⚠️  No databases directory found")
 
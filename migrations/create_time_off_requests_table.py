@@ -4,11 +4,69 @@ Create time_off_requests table for employee PTO/time off management
 
 import sqlite3
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Organization database filenames: org_<id>.db
+_ORG_RE = re.compile(r'^org_(\d+)\.db$')
+
+# Connection settings for this one-shot migration; both are per-connection
+MIGRATION_PRAGMAS = (
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Schema for a database that has no time_off_requests table yet
+TIME_OFF_REQUESTS_DDL = """
+    CREATE TABLE time_off_requests (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        organization_id INTEGER NOT NULL,
+        employee_id INTEGER NOT NULL,
+
+        -- Request details
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        request_type TEXT NOT NULL, -- pto, sick, unpaid, other
+        total_hours REAL NOT NULL,
+
+        -- Status tracking
+        status TEXT DEFAULT 'pending', -- pending, approved, denied
+        reason TEXT,
+        admin_notes TEXT,
+
+        -- Approval workflow
+        reviewed_by INTEGER, -- user_id who approved/denied
+        reviewed_at TIMESTAMP,
+
+        -- Audit
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY (organization_id) REFERENCES organizations(id),
+        FOREIGN KEY (employee_id) REFERENCES employees(id),
+        FOREIGN KEY (reviewed_by) REFERENCES users(id)
+    );
+
+    CREATE INDEX idx_time_off_employee
+    ON time_off_requests(employee_id);
+
+    CREATE INDEX idx_time_off_status
+    ON time_off_requests(status);
+
+    CREATE INDEX idx_time_off_dates
+    ON time_off_requests(start_date, end_date);
+
+    CREATE INDEX idx_time_off_org
+    ON time_off_requests(organization_id);
+"""
 
 def run_migration(db_path):
     """Create time_off_requests table"""
-    conn = sqlite3.connect(db_path)
+    # The script below opens and commits its own transaction
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
+    for pragma in MIGRATION_PRAGMAS:
+        cursor.execute(pragma)
 
     try:
         # Check if table already exists
@@ -19,70 +77,18 @@ def run_migration(db_path):
 
         if cursor.fetchone():
             print(f"  ⊙ Table 'time_off_requests' already exists in {db_path}")
-            conn.close()
             return True
 
-        # Create time_off_requests table
-        cursor.execute("""
-            CREATE TABLE time_off_requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                organization_id INTEGER NOT NULL,
-                employee_id INTEGER NOT NULL,
-
-                -- Request details
-                start_date DATE NOT NULL,
-                end_date DATE NOT NULL,
-                request_type TEXT NOT NULL, -- pto, sick, unpaid, other
-                total_hours REAL NOT NULL,
-
-                -- Status tracking
-                status TEXT DEFAULT 'pending', -- pending, approved, denied
-                reason TEXT,
-                admin_notes TEXT,
-
-                -- Approval workflow
-                reviewed_by INTEGER, -- user_id who approved/denied
-                reviewed_at TIMESTAMP,
-
-                -- Audit
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                FOREIGN KEY (organization_id) REFERENCES organizations(id),
-                FOREIGN KEY (employee_id) REFERENCES employees(id),
-                FOREIGN KEY (reviewed_by) REFERENCES users(id)
-            )
-        """)
-
-        # Create indexes for performance
-        cursor.execute("""
-            CREATE INDEX idx_time_off_employee
-            ON time_off_requests(employee_id)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX idx_time_off_status
-            ON time_off_requests(status)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX idx_time_off_dates
-            ON time_off_requests(start_date, end_date)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX idx_time_off_org
-            ON time_off_requests(organization_id)
-        """)
-
-        conn.commit()
+        # Table and indexes in one script and one explicit transaction
+        cursor.executescript(f"BEGIN IMMEDIATE;\n{TIME_OFF_REQUESTS_DDL}\nCOMMIT;")
         print(f"  ✓ Created 'time_off_requests' table in {db_path}")
         print(f"  ✓ Created indexes on employee_id, status, dates, organization_id")
         return True
 
     except Exception as e:
         print(f"  ✗ Error creating time_off_requests table in {db_path}: {e}")
-        conn.rollback()
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         return False
     finally:
         conn.close()
@@ -96,7 +102,11 @@ if __name__ == '__main__':
         exit(1)
 
     # Find all org databases
-    db_files = [f for f in os.listdir(databases_dir) if f.startswith('org_') and f.endswith('.db')]
+    with os.scandir(databases_dir) as entries:
+        db_files = [
+            entry.name for entry in entries
+            if entry.is_file(follow_symlinks=False) and _ORG_RE.match(entry.name)
+        ]
 
     if not db_files:
         print("No organization databases found!")
@@ -106,13 +116,12 @@ if __name__ == '__main__':
     print("Creating Time Off Requests Table")
     print(f"{'='*60}\n")
 
-    success_count = 0
-    for db_file in sorted(db_files):
-        db_path = os.path.join(databases_dir, db_file)
-        print(f"Processing {db_file}...")
-        if run_migration(db_path):
-            success_count += 1
-        print()
+    # Org databases are independent files: migrate them concurrently
+    db_paths = [os.path.join(databases_dir, f) for f in sorted(db_files)]
+    with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as executor:
+        results = list(executor.map(run_migration, db_paths))
+    success_count = sum(results)
+    print()
 
     print(f"{'='*60}")
     print(f"Migration complete: {success_count}/{len(db_files)} databases updated")
@@ -21,7 +21,8 @@ from db_manager import get_master_db
 from middleware import (
     super_admin_required,
     login_required,
-    log_audit
+    log_audit,
+    invalidate_org_cache
 )
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -286,6 +287,7 @@ def update_organization(org_id):
         """, update_values)
 
         conn.commit()
+        invalidate_org_cache(org_id)
 
         # Log changes
         changes = {k: {'old': old_data.get(k), 'new': data[k]}
@@ -325,6 +327,7 @@ def deactivate_organization(org_id):
     """, (org_id,))
 
     conn.commit()
+    invalidate_org_cache(org_id)
 
     log_audit('deactivated_organization', 'organization', org_id)
 
@@ -405,6 +408,7 @@ def create_organization():
 
         org_id = cursor.lastrowid
         conn.commit()
+        invalidate_org_cache(slug=slug)
 
         # Create organization database from template
         from db_manager import create_org_database
@@ -1006,6 +1010,7 @@ def update_organization_api():
         ))
 
         conn.commit()
+        invalidate_org_cache(org_id, slug=data.get('slug'))
 
         log_audit('updated_organization', 'organization', org_id, data.get('organization_name'), {
             'updated_fields': list(data.keys())
@@ -8,7 +8,7 @@ from flask import Blueprint, jsonify, request, session, redirect, render_templat
 import sqlite3
 
 from db_manager import get_master_db, get_org_db
-from utils.auth import hash_password, verify_password
+from utils.auth import hash_password, needs_rehash, verify_password
 from middleware.tenant_context_separate_db import login_required, organization_required
 
 auth_bp = Blueprint('auth', __name__)
@@ -89,6 +89,13 @@ def login():
     cursor.execute("""
         UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
     """, (user['id'],))
+    # Upgrade SHA-256/PBKDF2 (or outdated scrypt) hashes now that the
+    # plaintext is known; same password, so sessions stay valid
+    if needs_rehash(user['password_hash']):
+        cursor.execute(
+            "UPDATE users SET password_hash = ? WHERE id = ?",
+            (hash_password(password), user['id']),
+        )
     conn.commit()
     conn.close()
 
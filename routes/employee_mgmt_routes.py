@@ -10,7 +10,9 @@ import sqlite3
 from db_manager import get_org_db, get_master_db
 from utils.auth import hash_password
 from utils.audit import log_audit
-from middleware.tenant_context_separate_db import login_required, organization_required, organization_admin_required
+from middleware.tenant_context_separate_db import (
+    login_required, organization_required, organization_admin_required, invalidate_org_cache
+)
 
 employee_mgmt_bp = Blueprint('employee_mgmt', __name__)
 
@@ -65,6 +67,7 @@ def upload_organization_logo():
 
         conn.commit()
         conn.close()
+        invalidate_org_cache(org_id)
 
         # Log the action
         log_audit('updated_organization_logo', 'organization', org_id, g.organization['organization_name'], {
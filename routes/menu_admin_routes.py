@@ -12,7 +12,8 @@ from flask import Blueprint, jsonify, request, g
 import json
 from db_manager import get_org_db, get_master_db
 from middleware.tenant_context_separate_db import (
-    login_required, organization_required, organization_admin_required
+    login_required, organization_required, organization_admin_required,
+    invalidate_org_cache
 )
 
 menu_admin_bp = Blueprint('menu_admin', __name__, url_prefix='/api/menu-admin')
@@ -128,6 +129,7 @@ def update_settings():
     cursor.execute(f"UPDATE organizations SET {set_clause} WHERE id = ?", values)
     conn.commit()
     conn.close()
+    invalidate_org_cache(org['id'], domain=updates.get('custom_domain'))
 
     return jsonify({'success': True})
 
@@ -14,7 +14,7 @@ logger = logging.getLogger(__name__)
 
 from db_manager import get_org_db
 from sales_operations import record_sales_to_db
-from middleware import login_required, organization_required
+from middleware import guard
 
 pos_bp = Blueprint('pos', __name__, url_prefix='/api/pos')
 
@@ -501,8 +501,7 @@ def create_order_core(cursor, data, source='pos', request_ip='POS'):
 
 
 @pos_bp.route('/orders', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def create_order():
     """
     Create order + items + payment + feed sales pipeline.
@@ -556,8 +555,7 @@ def create_order():
 
 
 @pos_bp.route('/orders', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def list_orders():
     """List orders with optional date/status filters. Defaults to today."""
     date_filter = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
@@ -598,8 +596,7 @@ def list_orders():
 
 
 @pos_bp.route('/orders/<int:order_id>', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def get_order(order_id):
     """Get a single order with items and payments."""
     try:
@@ -629,8 +626,7 @@ def get_order(order_id):
 
 
 @pos_bp.route('/next-order-number', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def next_order_number():
     """Get the next order number for display (doesn't reserve it)."""
     try:
@@ -653,8 +649,7 @@ def next_order_number():
 # ==========================================
 
 @pos_bp.route('/employees', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def list_pos_employees():
     """List active employees for POS employee selection screen."""
     try:
@@ -678,8 +673,7 @@ def list_pos_employees():
 
 
 @pos_bp.route('/employees/<int:employee_id>/void-permission', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def toggle_void_permission(employee_id):
     """Toggle void permission for an employee. Admin only."""
     if not (g.get('is_super_admin') or g.get('is_organization_admin')):
@@ -707,8 +701,7 @@ def toggle_void_permission(employee_id):
 
 
 @pos_bp.route('/auth', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def pos_employee_auth():
     """Authenticate an employee by code for POS session."""
     data = request.get_json()
@@ -754,7 +747,7 @@ def pos_employee_auth():
 
 
 @pos_bp.route('/auth/logout', methods=['POST'])
-@login_required
+@guard()
 def pos_employee_logout():
     """Clear POS employee session (switch employee)."""
     session.pop('pos_employee_id', None)
@@ -763,8 +756,7 @@ def pos_employee_logout():
 
 
 @pos_bp.route('/auth/status', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def pos_auth_status():
     """Return current POS employee from session, re-validated against DB."""
     emp_id = session.get('pos_employee_id')
@@ -806,8 +798,7 @@ def pos_auth_status():
 
 
 @pos_bp.route('/auth/admin-resolve', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def pos_admin_resolve():
     """Look up admin's employee record and set POS session if found."""
     if not (g.get('is_super_admin') or g.get('is_organization_admin')):
@@ -878,8 +869,7 @@ def _check_void_permission(cursor):
 
 
 @pos_bp.route('/product-availability', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def product_availability():
     """Check which products can be made based on current ingredient stock + manual 86."""
     try:
@@ -944,8 +934,7 @@ def product_availability():
 
 
 @pos_bp.route('/86/<int:product_id>', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def toggle_86(product_id):
     """Toggle manual 86 on a product."""
     try:
@@ -976,8 +965,7 @@ def toggle_86(product_id):
 
 
 @pos_bp.route('/product-ingredients', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def product_ingredients():
     """Return ingredient names per product for search-by-ingredient."""
     try:
@@ -1050,8 +1038,7 @@ def _get_group_products(cursor, group):
 
 
 @pos_bp.route('/86-groups', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def list_86_groups():
     """List all 86 groups with their products and status."""
     try:
@@ -1086,8 +1073,7 @@ def list_86_groups():
 
 
 @pos_bp.route('/86-groups', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def create_86_group():
     """Create a custom 86 group."""
     try:
@@ -1122,8 +1108,7 @@ def create_86_group():
 
 
 @pos_bp.route('/86-groups/<int:group_id>', methods=['PUT'])
-@login_required
-@organization_required
+@guard(org=True)
 def update_86_group(group_id):
     """Update an 86 group (rename and/or change products for custom groups)."""
     try:
@@ -1162,8 +1147,7 @@ def update_86_group(group_id):
 
 
 @pos_bp.route('/86-groups/<int:group_id>', methods=['DELETE'])
-@login_required
-@organization_required
+@guard(org=True)
 def delete_86_group(group_id):
     """Delete a custom 86 group. Category groups cannot be deleted."""
     try:
@@ -1190,8 +1174,7 @@ def delete_86_group(group_id):
 
 
 @pos_bp.route('/86-groups/<int:group_id>/toggle', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def toggle_86_group(group_id):
     """Bulk 86 or un-86 all products in a group."""
     try:
@@ -1231,8 +1214,7 @@ def toggle_86_group(group_id):
 
 
 @pos_bp.route('/86-groups/sync-categories', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def sync_category_groups():
     """Auto-create category groups from distinct product categories."""
     try:
@@ -1268,8 +1250,7 @@ def sync_category_groups():
 # ==========================================
 
 @pos_bp.route('/orders/<int:order_id>/status', methods=['PATCH'])
-@login_required
-@organization_required
+@guard(org=True)
 def update_order_status(order_id):
     """Update order status with timestamp."""
     data = request.get_json()
@@ -1372,8 +1353,7 @@ def update_order_status(order_id):
 
 
 @pos_bp.route('/kitchen', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def kitchen_orders():
     """Get active orders for kitchen display (confirmed + preparing)."""
     try:
@@ -1411,8 +1391,7 @@ def kitchen_orders():
 # ==========================================
 
 @pos_bp.route('/register/open', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def open_register():
     """Start a register session with opening cash count."""
     data = request.get_json()
@@ -1447,8 +1426,7 @@ def open_register():
 
 
 @pos_bp.route('/register/close', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def close_register():
     """Close register session with closing cash count and reconciliation."""
     data = request.get_json()
@@ -1543,8 +1521,7 @@ def close_register():
 
 
 @pos_bp.route('/register/current', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def current_register():
     """Get active register session(s) with running totals.
 
@@ -1678,8 +1655,7 @@ def _build_receipt_html(order, items, payments, org_name=''):
 
 
 @pos_bp.route('/orders/<int:order_id>/receipt', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def get_receipt(order_id):
     """Get receipt data for an order (for printing)."""
     try:
@@ -1717,8 +1693,7 @@ def get_receipt(order_id):
 
 
 @pos_bp.route('/orders/<int:order_id>/receipt/email', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def email_receipt(order_id):
     """Email receipt to customer."""
     data = request.get_json() or {}
@@ -1781,8 +1756,7 @@ def email_receipt(order_id):
 
 
 @pos_bp.route('/orders/<int:order_id>/receipt/sms', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def sms_receipt(order_id):
     """Text receipt summary to customer."""
     data = request.get_json() or {}
@@ -1825,8 +1799,7 @@ def sms_receipt(order_id):
 # ==========================================
 
 @pos_bp.route('/customers/lookup', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def customer_lookup():
     """Look up customer by phone number."""
     phone = request.args.get('phone', '').strip()
@@ -1877,8 +1850,7 @@ def customer_lookup():
 
 
 @pos_bp.route('/customers', methods=['POST'])
-@login_required
-@organization_required
+@guard(org=True)
 def create_or_update_customer():
     """Create or update a customer profile. Called automatically on order completion."""
     data = request.get_json()
@@ -1930,8 +1902,7 @@ def create_or_update_customer():
 
 
 @pos_bp.route('/tips/summary', methods=['GET'])
-@login_required
-@organization_required
+@guard(org=True)
 def tips_summary():
     """Get tip totals per employee for a date range."""
     start = request.args.get('start', datetime.now().strftime('%Y-%m-%d'))
@@ -1973,8 +1944,7 @@ def tips_summary():
 
 
 @pos_bp.route('/customers/<int:customer_id>/notes', methods=['PUT'])
-@login_required
-@organization_required
+@guard(org=True)
 def update_customer_notes(customer_id):
     """Update customer notes (allergies, preferences, etc.)."""
     data = request.get_json()
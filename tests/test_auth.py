@@ -0,0 +1,71 @@
+"""
+Password hashing (utils.auth) - scrypt, PBKDF2 and legacy SHA-256 formats
+Run: python -m pytest tests/test_auth.py
+"""
+
+import base64
+import hashlib
+
+import pytest
+
+from utils.auth import hash_password, needs_rehash, verify_password
+
+SALT = bytes(range(16))
+
+
+def b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def pbkdf2_hash(password, encode, iterations=1000):
+    dk = hashlib.pbkdf2_hmac('sha256', password.encode(), SALT, iterations)
+    return f"pbkdf2_sha256${iterations}${encode(SALT)}${encode(dk)}"
+
+
+def legacy_hash(password):
+    salt = SALT.hex()
+    return f"{salt}${hashlib.sha256((password + salt).encode()).hexdigest()}"
+
+
+def test_scrypt_roundtrip():
+    stored = hash_password('s3cret')
+
+    assert stored.startswith('scrypt$')
+    assert verify_password('s3cret', stored)
+    assert not verify_password('wrong', stored)
+    assert not needs_rehash(stored)
+
+
+def test_scrypt_salt_is_random():
+    assert hash_password('s3cret') != hash_password('s3cret')
+
+
+def test_scrypt_with_other_cost_needs_rehash():
+    dk = hashlib.scrypt(b's3cret', salt=SALT, n=2 ** 10, r=8, p=1, dklen=32)
+    stored = f"scrypt${2 ** 10}$8$1${b64(SALT)}${b64(dk)}"
+
+    assert verify_password('s3cret', stored)
+    assert needs_rehash(stored)
+
+
+@pytest.mark.parametrize('encode', [b64, bytes.hex], ids=['base64', 'hex'])
+def test_pbkdf2_verifies_and_needs_rehash(encode):
+    stored = pbkdf2_hash('s3cret', encode)
+
+    assert verify_password('s3cret', stored)
+    assert not verify_password('wrong', stored)
+    assert needs_rehash(stored)
+
+
+def test_legacy_sha256_verifies_and_needs_rehash():
+    stored = legacy_hash('s3cret')
+
+    assert verify_password('s3cret', stored)
+    assert not verify_password('wrong', stored)
+    assert needs_rehash(stored)
+
+
+@pytest.mark.parametrize('stored', ['', 'garbage', 'a$b$c', 'scrypt$x$8$1$AA$AA', 'pbkdf2_sha256$x$AA$AA'])
+def test_malformed_hash_is_rejected(stored):
+    assert not verify_password('s3cret', stored)
+    assert needs_rehash(stored)
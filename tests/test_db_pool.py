@@ -0,0 +1,122 @@
+"""
+Org connection pool (db_manager) - checkout/release lifecycle
+Run: python -m pytest tests/test_db_pool.py
+"""
+
+import sqlite3
+
+import pytest
+
+import db_manager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'org_1.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    yield path
+    db_manager.close_org_pool()
+
+
+def test_close_returns_connection_to_pool(db_path):
+    conn = db_manager._checkout_org_conn(db_path)
+    raw = conn._conn
+    conn.close()
+
+    assert db_manager._org_pool[db_path] == [raw]
+    again = db_manager._checkout_org_conn(db_path)
+    assert again._conn is raw
+    assert db_path not in db_manager._org_pool
+    again.close()
+
+
+def test_checkout_resets_row_factory(db_path):
+    conn = db_manager._checkout_org_conn(db_path)
+    conn.row_factory = None
+    conn.close()
+
+    conn = db_manager._checkout_org_conn(db_path)
+    assert conn.row_factory is sqlite3.Row
+    conn.close()
+
+
+def test_release_rolls_back_open_transaction(db_path):
+    conn = db_manager._checkout_org_conn(db_path)
+    conn.execute("INSERT INTO items (name) VALUES ('uncommitted')")
+    assert conn.in_transaction
+    conn.close()
+
+    conn = db_manager._checkout_org_conn(db_path)
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    conn.close()
+
+
+def test_double_close_does_not_release_another_checkout(db_path):
+    a = db_manager._checkout_org_conn(db_path)
+    a.close()
+
+    b = db_manager._checkout_org_conn(db_path)
+    b.execute("INSERT INTO items (name) VALUES ('b')")
+    assert b.in_transaction
+
+    a.close()  # Stale second close from the first checkout
+
+    assert b.in_transaction
+    assert db_path not in db_manager._org_pool
+    c = db_manager._checkout_org_conn(db_path)
+    assert c._conn is not b._conn
+
+    b.commit()
+    assert c.execute("SELECT name FROM items").fetchall()[0]['name'] == 'b'
+    b.close()
+    c.close()
+
+
+def test_closed_handle_rejects_use(db_path):
+    conn = db_manager._checkout_org_conn(db_path)
+    conn.close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_context_manager_commits(db_path):
+    conn = db_manager._checkout_org_conn(db_path)
+    with conn as same:
+        assert same is conn
+        conn.execute("INSERT INTO items (name) VALUES ('ctx')")
+    assert not conn.in_transaction
+    conn.close()
+
+
+def test_idle_connections_are_capped(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, 'ORG_POOL_MAX_IDLE', 2)
+    paths = [str(tmp_path / f'org_{n}.db') for n in range(2, 5)]
+
+    conns = [db_manager._checkout_org_conn(path) for path in paths]
+    for conn in conns:
+        conn.close()
+
+    assert db_manager._org_pool_idle == 2
+    assert list(db_manager._org_pool) == paths[1:]
+
+
+def test_evict_closes_idle_and_checked_out_connections(db_path):
+    idle = db_manager._checkout_org_conn(db_path)
+    busy = db_manager._checkout_org_conn(db_path)
+    idle_raw, busy_raw = idle._conn, busy._conn
+    idle.close()
+
+    db_manager.evict_org_pool(db_path)
+    assert db_path not in db_manager._org_pool
+    with pytest.raises(sqlite3.ProgrammingError):
+        idle_raw.execute("SELECT 1")
+
+    busy.close()
+    assert db_path not in db_manager._org_pool
+    with pytest.raises(sqlite3.ProgrammingError):
+        busy_raw.execute("SELECT 1")
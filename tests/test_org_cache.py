@@ -0,0 +1,140 @@
+"""
+Organization lookup cache (tenant_context_separate_db) - TTL and invalidation
+Run: python -m pytest tests/test_org_cache.py
+"""
+
+import sqlite3
+
+import pytest
+
+import middleware.tenant_context_separate_db as tenant
+
+
+@pytest.fixture
+def master(monkeypatch):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE organizations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            organization_name TEXT NOT NULL,
+            slug TEXT NOT NULL UNIQUE,
+            db_filename TEXT NOT NULL,
+            owner_name TEXT NOT NULL,
+            owner_email TEXT NOT NULL,
+            logo_url TEXT,
+            plan_type TEXT DEFAULT 'basic',
+            subscription_status TEXT DEFAULT 'active',
+            features TEXT,
+            custom_domain TEXT,
+            active INTEGER DEFAULT 1
+        )
+    """)
+    conn.execute("""
+        INSERT INTO organizations (organization_name, slug, db_filename, owner_name, owner_email, custom_domain)
+        VALUES ('Acme', 'acme', 'org_1.db', 'Owner', 'owner@acme.test', 'shop.acme.test')
+    """)
+    conn.commit()
+
+    # Lookups read this connection; the schema is re-detected against it
+    monkeypatch.setattr(tenant, 'get_request_master_db', lambda: conn)
+    monkeypatch.setattr(tenant, 'HAS_FEATURES_COL', None)
+    tenant.invalidate_org_cache()
+    yield conn
+    tenant.invalidate_org_cache()
+    conn.close()
+
+
+def rename(conn, name, **where):
+    column, value = next(iter(where.items()))
+    conn.execute(f"UPDATE organizations SET organization_name = ? WHERE {column} = ?", (name, value))
+    conn.commit()
+
+
+def test_lookup_is_served_from_cache(master):
+    assert tenant.get_organization_by_id(1)['organization_name'] == 'Acme'
+    rename(master, 'Acme Renamed', id=1)
+
+    assert tenant.get_organization_by_id(1)['organization_name'] == 'Acme'
+
+
+def test_invalidate_by_org_id_drops_every_lookup_kind(master):
+    tenant.get_organization_by_id(1)
+    tenant.get_organization_by_slug('acme')
+    tenant.get_organization_full(1)
+    tenant.get_organization_by_custom_domain('shop.acme.test')
+    rename(master, 'Acme Renamed', id=1)
+
+    tenant.invalidate_org_cache(1)
+
+    assert tenant.get_organization_by_id(1)['organization_name'] == 'Acme Renamed'
+    assert tenant.get_organization_by_slug('acme')['organization_name'] == 'Acme Renamed'
+    assert tenant.get_organization_full(1)['organization_name'] == 'Acme Renamed'
+    assert tenant.get_organization_by_custom_domain('shop.acme.test')['organization_name'] == 'Acme Renamed'
+
+
+def test_invalidate_other_org_keeps_entry(master):
+    tenant.get_organization_by_id(1)
+    rename(master, 'Acme Renamed', id=1)
+
+    tenant.invalidate_org_cache(2)
+
+    assert tenant.get_organization_by_id(1)['organization_name'] == 'Acme'
+
+
+def test_invalidate_by_slug_drops_cached_miss(master):
+    assert tenant.get_organization_by_slug('newco') is None
+    master.execute("""
+        INSERT INTO organizations (organization_name, slug, db_filename, owner_name, owner_email)
+        VALUES ('NewCo', 'newco', 'org_2.db', 'Owner', 'owner@newco.test')
+    """)
+    master.commit()
+    assert tenant.get_organization_by_slug('newco') is None
+
+    tenant.invalidate_org_cache(slug='newco')
+
+    assert tenant.get_organization_by_slug('newco')['organization_name'] == 'NewCo'
+
+
+def test_invalidate_by_domain_drops_cached_miss(master):
+    assert tenant.get_organization_by_custom_domain('www.acme.test') is None
+    master.execute("UPDATE organizations SET custom_domain = 'www.acme.test' WHERE id = 1")
+    master.commit()
+
+    tenant.invalidate_org_cache(1, domain='www.acme.test')
+
+    assert tenant.get_organization_by_custom_domain('www.acme.test')['id'] == 1
+
+
+def test_invalidate_clears_non_storefront_hosts(master):
+    tenant._mark_non_storefront_host('shop.acme.test')
+    assert tenant._is_non_storefront_host('shop.acme.test')
+
+    tenant.invalidate_org_cache(1)
+
+    assert not tenant._is_non_storefront_host('shop.acme.test')
+
+
+def test_entry_expires_after_ttl(master, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tenant.time, 'monotonic', lambda: now[0])
+    tenant.get_organization_by_id(1)
+    rename(master, 'Acme Renamed', id=1)
+
+    now[0] += tenant.ORG_CACHE_TTL - 1
+    assert tenant.get_organization_by_id(1)['organization_name'] == 'Acme'
+
+    now[0] += 2
+    assert tenant.get_organization_by_id(1)['organization_name'] == 'Acme Renamed'
+
+
+def test_miss_uses_negative_ttl(master, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tenant.time, 'monotonic', lambda: now[0])
+    assert tenant._org_cache_get('slug', 'newco') == (False, None)
+    tenant._org_cache_put('slug', 'newco', None)
+    assert tenant._org_cache_get('slug', 'newco') == (True, None)
+
+    now[0] += tenant.ORG_CACHE_NEGATIVE_TTL + 1
+
+    assert tenant._org_cache_get('slug', 'newco') == (False, None)
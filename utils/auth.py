@@ -1,21 +1,85 @@
 """Password hashing and verification utilities."""
 
+import base64
 import hashlib
-import secrets
+import hmac
+import os
+
+# New hashes are "scrypt$<n>$<r>$<p>$<salt>$<hash>": scrypt is memory-hard, so
+# the cost parameters stored with each hash also bound what a GPU attacker can
+# parallelise. Salt and hash are unpadded URL-safe base64.
+SCRYPT_ALGORITHM = 'scrypt'
+SCRYPT_N = 2 ** 14  # CPU/memory cost: 128 * n * r bytes = 16 MB per hash
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_DKLEN = 32
+
+# Older formats still verify, and needs_rehash() flags them for upgrade:
+# "pbkdf2_sha256$<iterations>$<salt>$<hash>" (base64, or hex from earlier
+# releases) and the original "<salt hex>$<sha256 hex>".
+PBKDF2_ALGORITHM = 'pbkdf2_sha256'
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _decode(text):
+    """Decode a stored salt/hash field: 16/32-byte hex or unpadded base64."""
+    if len(text) in (32, 64):
+        return bytes.fromhex(text)
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p, dklen=SCRYPT_DKLEN):
+    # OpenSSL's default 32 MB memory cap would reject larger stored costs
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=2 * 128 * n * r * p, dklen=dklen,
+    )
 
 
 def hash_password(password):
-    """Hash password using SHA-256 with salt."""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${pwd_hash}"
+    """Hash password using scrypt with a random salt."""
+    salt = os.urandom(16)
+    dk = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return (f"{SCRYPT_ALGORITHM}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}"
+            f"${_b64encode(salt)}${_b64encode(dk)}")
 
 
 def verify_password(password, password_hash):
-    """Verify password against stored hash."""
+    """Verify password against stored hash (scrypt, PBKDF2 or legacy SHA-256)."""
     try:
-        salt, pwd_hash = password_hash.split('$')
-        test_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        return test_hash == pwd_hash
+        parts = password_hash.split('$')
+        if len(parts) == 6 and parts[0] == SCRYPT_ALGORITHM:
+            _, n, r, p, salt, pwd_hash = parts
+            expected = _decode(pwd_hash)
+            dk = _scrypt(password, _decode(salt), int(n), int(r), int(p), len(expected))
+            return hmac.compare_digest(dk, expected)
+        if len(parts) == 4 and parts[0] == PBKDF2_ALGORITHM:
+            _, iterations, salt, pwd_hash = parts
+            dk = hashlib.pbkdf2_hmac(
+                'sha256', password.encode(), _decode(salt), int(iterations)
+            )
+            return hmac.compare_digest(dk, _decode(pwd_hash))
+        salt, pwd_hash = parts
+        # sha256(password + salt) without building the concatenated string
+        h = hashlib.sha256(password.encode())
+        h.update(salt.encode())
+        return hmac.compare_digest(h.hexdigest(), pwd_hash)
     except Exception:
         return False
+
+
+def needs_rehash(password_hash):
+    """True when a stored hash is not scrypt at the current cost parameters.
+
+    Call after a successful verify_password() and store hash_password() of the
+    same password to upgrade the user transparently.
+    """
+    parts = password_hash.split('$')
+    return not (
+        len(parts) == 6
+        and parts[0] == SCRYPT_ALGORITHM
+        and parts[1:4] == [str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    )